@@ -3,9 +3,14 @@
 '''
 
 import math
+import os
+import time
 import json
+import functools
+import abc
+from collections import deque
+import csv
 import numpy as np
-import matplotlib.pyplot as plt
 import util.wellengcalc as wec
 import util.unit as wecu
 from util.unit import convert as ucon
@@ -35,14 +40,26 @@ class ABWaveInputData():
         self.fluid_viscosity = fluid_viscosity
         self.model= model
 
+ABWAVE_NUMERIC_FIELDS = ('openhole_id', 'openhole_roughness', 'screen_od', 'screen_id', 'screen_roughness',
+                         'centralizer_od', 'washpipe_od', 'washpipe_id', 'washpipe_roughness',
+                         'solid_diameter', 'solid_density', 'solid_loading', 'solid_absVol',
+                         'fluid_density', 'fluid_viscosity')
+ABWAVE_RESULT_FIELDS = ('dune_height_ratio', 'dune_height', 'hydraulic_diameter', 'equivalent_diameter', 'area_o', 'area_i',
+                        'perimeter_o', 'perimeter_i', 'width_o', 'width_i', 'v_crit', 'screen_oh_rate', 'washpipe_screen_rate',
+                        'pump_rate', 'return_rate', 'screen_oh_dp', 'washpipe_screen_dp', 'washpipe_screen_dp_beta', 'washpipe_dp')
+ABWAVE_TEXT_FIELDS = ('name', 'description', 'model')
+ABWAVE_SOLVER_VERSION = '1'        #change whenever solver changes alter results, persisted caches key on it
+
 class ABWaveResults():
+    __slots__ = ABWAVE_TEXT_FIELDS + ABWAVE_RESULT_FIELDS
     def __init__(self, name:str, description:str, 
                  dune_height_ratio:float, dune_height:float, hydraulic_diameter:float, equivalent_diameter:float, 
                  area_o, area_i:float, perimeter_o:float, perimeter_i:float, width_o:float, width_i:float,
                  v_crit:float, screen_oh_rate:float, washpipe_screen_rate:float, pump_rate:float, return_rate:float, 
-                 screen_oh_dp:float, washpipe_screen_dp:float):
+                 screen_oh_dp:float, washpipe_screen_dp:float, washpipe_screen_dp_beta:float=None, washpipe_dp:float=None, model:str=None):
         self.name = name
         self.description = description
+        self.model = model
         self.dune_height_ratio = dune_height_ratio
         self.dune_height = dune_height
         self.hydraulic_diameter = hydraulic_diameter
@@ -60,6 +77,125 @@ class ABWaveResults():
         self.return_rate = return_rate
         self.screen_oh_dp = screen_oh_dp
         self.washpipe_screen_dp = washpipe_screen_dp
+        self.washpipe_screen_dp_beta = washpipe_screen_dp_beta      #washpipe-screen dP at full pump rate, beta wave friction per unit length
+        self.washpipe_dp = washpipe_dp                              #washpipe dP at return rate per unit length
+
+class ABWaveResultsView(ABWaveResults):
+    #row of an ABWaveResultSet, reads and writes straight through to the columns instead of holding its own values
+    __slots__ = ('_result_set', '_index')
+    def __init__(self, result_set, index:int):
+        self._result_set = result_set
+        self._index = index
+
+def _result_column_property(field:str):
+    def getter(self):
+        return self._result_set._columns[field][self._index]
+    def setter(self, value):
+        self._result_set._columns[field][self._index] = value
+    return property(getter, setter)
+
+for _field in ABWAVE_TEXT_FIELDS + ABWAVE_RESULT_FIELDS:
+    setattr(ABWaveResultsView, _field, _result_column_property(_field))
+
+class ABWaveResultSet():
+    #struct of arrays, one numpy array per ABWaveResults field, for sweeps that keep many points in memory
+    #columns grow in place with amortized doubling and column() / attribute access return views without copying
+    def __init__(self, results=None, capacity:int=64):
+        self._size = 0
+        self._columns = {field: np.empty(capacity, dtype=object) for field in ABWAVE_TEXT_FIELDS}
+        self._columns.update({field: np.empty(capacity, dtype=float) for field in ABWAVE_RESULT_FIELDS})
+        if results is not None:
+            self.extend(results)
+
+    @classmethod
+    def from_columns(cls, columns:dict):
+        #wraps existing arrays, e.g. fields of a structured or memory mapped array, without copying them
+        result_set = cls(capacity=0)
+        size = len(columns[ABWAVE_RESULT_FIELDS[0]])
+        for field in ABWAVE_TEXT_FIELDS + ABWAVE_RESULT_FIELDS:
+            result_set._columns[field] = columns[field] if field in columns else np.full(size, None if field in ABWAVE_TEXT_FIELDS else np.nan, dtype=result_set._columns[field].dtype)
+        result_set._size = size
+        return result_set
+
+    def __len__(self):
+        return self._size
+
+    def _reserve(self, count:int):
+        capacity = len(self._columns[ABWAVE_RESULT_FIELDS[0]])
+        if self._size + count <= capacity:
+            return
+        capacity = max(2 * capacity, self._size + count, 64)
+        for field, column in self._columns.items():
+            grown = np.empty(capacity, dtype=object if field in ABWAVE_TEXT_FIELDS else float)
+            grown[:self._size] = column[:self._size]
+            self._columns[field] = grown
+
+    def append(self, result:ABWaveResults):
+        self._reserve(1)
+        for field in ABWAVE_TEXT_FIELDS + ABWAVE_RESULT_FIELDS:
+            value = getattr(result, field)
+            self._columns[field][self._size] = np.nan if value is None and field in ABWAVE_RESULT_FIELDS else value
+        self._size = self._size + 1
+
+    def extend(self, results):
+        #accepts another ABWaveResultSet, an iterable of ABWaveResults, or the array valued ABWaveResults of calc_AlphaBetaWave_batch
+        if isinstance(results, ABWaveResults) and np.ndim(results.dune_height_ratio) > 0:
+            count = np.size(results.dune_height_ratio)
+            self._reserve(count)
+            for field in ABWAVE_TEXT_FIELDS:
+                self._columns[field][self._size:self._size + count] = getattr(results, field)
+            for field in ABWAVE_RESULT_FIELDS:
+                value = getattr(results, field)
+                self._columns[field][self._size:self._size + count] = np.nan if value is None else np.ravel(value)
+            self._size = self._size + count
+        elif isinstance(results, ABWaveResultSet):
+            self._reserve(len(results))
+            for field in ABWAVE_TEXT_FIELDS + ABWAVE_RESULT_FIELDS:
+                self._columns[field][self._size:self._size + len(results)] = results.column(field)
+            self._size = self._size + len(results)
+        else:
+            for result in results:
+                self.append(result)
+
+    def column(self, field:str):
+        return self._columns[field][:self._size]
+
+    def __getattr__(self, field:str):
+        if field in ABWAVE_TEXT_FIELDS or field in ABWAVE_RESULT_FIELDS:
+            return self.column(field)
+        raise AttributeError(field)
+
+    def __getitem__(self, index):
+        #integer gives a row view, a slice gives a result set sharing the same memory
+        if isinstance(index, slice):
+            return ABWaveResultSet.from_columns({field: self.column(field)[index] for field in self._columns})
+        if index < 0:
+            index = index + self._size
+        if not 0 <= index < self._size:
+            raise IndexError(index)
+        return ABWaveResultsView(self, index)
+
+    def __iter__(self):
+        for index in range(self._size):
+            yield ABWaveResultsView(self, index)
+
+    def select(self, model:str=None, dune_height_ratio=None, name:str=None):
+        #rows matching a model, name and/or one or more dune height ratios, as a new result set
+        mask = np.ones(self._size, dtype=bool)
+        if model is not None:
+            mask &= self.column('model') == model
+        if name is not None:
+            mask &= self.column('name') == name
+        if dune_height_ratio is not None:
+            mask &= np.isin(self.column('dune_height_ratio'), dune_height_ratio)
+        return ABWaveResultSet.from_columns({field: self.column(field)[mask] for field in self._columns})
+
+    def models(self):
+        return list(dict.fromkeys(self.column('model')))
+
+    def to_dict(self):
+        #{dune_height_ratio: ABWaveResults} as built by looping over calc_AlphaBetaWave
+        return {float(row.dune_height_ratio): row for row in self}
 
 class BetaWave():
     def __init__(self, hydraulic_diameter:float, equivalent_diameter:float, area:float, washpipe_screen_dp:float, dmass_dlength:float):
@@ -69,12 +205,39 @@ class BetaWave():
         self.washpipe_screen_dp = washpipe_screen_dp
         self.dmass_dlength = dmass_dlength
 
-def read_saved_file_json(data_filename:str):
-    with open(data_filename, 'r',) as file:
-        data_dictionary = json.load(file)      
-    abinputs:ABWaveInputData
-    abresults:dict[str,ABWaveResults] = {}
-    #unit_class = UnitSystemClass(**data_dictionary)      #this would work if the class names were identical to the dictionary
+UNIT_FIELDS = ('angle', 'area', 'capacity', 'concentration', 'density_gas', 'density_liquid', 'density_solid', 'diameter', 'force',
+               'length', 'mass', 'mass_gradient', 'mass_rate', 'permeability', 'power', 'pressure', 'pressure_gradient', 'temperature', 'velocity',
+               'viscosity', 'volume', 'volumetric_rate')
+_UNIT_DEFAULTS = {'power': 'hp', 'viscosity': 'cP'}      #not listed in older files such as abwave_example.json
+
+def abinputs_to_dict(abinputs:ABWaveInputData):
+    data_dictionary = {'name': abinputs.name, 'description': abinputs.description}
+    data_dictionary.update({field: float(getattr(abinputs, field)) for field in ABWAVE_NUMERIC_FIELDS})
+    data_dictionary['model'] = abinputs.model
+    return data_dictionary
+
+def abinputs_from_dict(data_dictionary:dict):
+    _dd = data_dictionary
+    return ABWaveInputData(_dd.get('name', ''), _dd.get('description', ''), *[_dd[field] for field in ABWAVE_NUMERIC_FIELDS], _dd['model'])
+
+def units_to_dict(unit_class):
+    data_dictionary = {'system_name': unit_class.name_unitsystem}
+    data_dictionary.update({field: getattr(unit_class, field) for field in UNIT_FIELDS})
+    return data_dictionary
+
+def units_from_dict(data_dictionary:dict):
+    _dd = data_dictionary
+    return wecu.UnitSystem(_dd['system_name'], *[_dd.get(field, _UNIT_DEFAULTS.get(field)) for field in UNIT_FIELDS])
+
+def _as_result_set(abresults):
+    if abresults is None or isinstance(abresults, ABWaveResultSet):
+        return abresults
+    if isinstance(abresults, dict):
+        abresults = abresults.values()
+    return ABWaveResultSet(abresults)
+
+def _read_legacy_json(data_dictionary:dict):
+    #layout with 'AB Inputs' / 'AB Results' sections and title case unit names
     _dd = data_dictionary['Units']
     unit_class = wecu.UnitSystem(_dd['Unit System'], _dd['Angle'], _dd['Area'], _dd['Capacity'], _dd['Concentration'], 
                                  _dd['Density Gas'], _dd['Density Liquid'], _dd['Density Solid'], _dd['Diameter'], _dd['Force'], 
@@ -89,140 +252,517 @@ def read_saved_file_json(data_filename:str):
                                 _dd['solid_diameter'], _dd['solid_density'], _dd['solid_loading'], _dd['solid_absVol'],
                                 _dd['fluid_density'], _dd['fluid_viscosity'], _dd['model'])
     
-    _dd = data_dictionary['AB Results']
+    abresults = ABWaveResultSet()
+    _dd = data_dictionary.get('AB Results', {})
     for key in _dd:
-        abresults[key] = ABWaveResults(_dd[key]['Name'], _dd[key]['Description'], 
+        abresults.append(ABWaveResults(_dd[key]['Name'], _dd[key]['Description'], 
                                     _dd[key]['dune_height_ratio'], _dd[key]['dune_height'], _dd[key]['hydraulic_diameter'], _dd[key]['equivalent_diameter'],
                                     _dd[key]['area_o'], _dd[key]['area_i'], _dd[key]['perimeter_o'], _dd[key]['perimeter_i'], _dd[key]['width_o'], _dd[key]['width_i'],  
-                                    _dd[key]['v_crit'], _dd[key]['screen_oh_rate'], _dd[key]['washpipe_screen_rate'], _dd[key]['pump_rate'], _dd[key]['return_rate'], _dd[key]['screen_oh_dp'], _dd[key]['washpipe_screen_dp'])
-        
+                                    _dd[key]['v_crit'], _dd[key]['screen_oh_rate'], _dd[key]['washpipe_screen_rate'], _dd[key]['pump_rate'], _dd[key]['return_rate'], _dd[key]['screen_oh_dp'], _dd[key]['washpipe_screen_dp']))
+    return abinputs, abresults, unit_class
+
+def read_saved_file_json(data_filename:str):
+    #reads the abwave_example.json layout: 'Parameters', 'Units' and optional columnar 'Results', older 'AB Inputs' files are still read
+    #returns ABWaveInputData, ABWaveResultSet (None when the file has no results) and UnitSystem
+    with open(data_filename, 'r',) as file:
+        data_dictionary = json.load(file)      
+    if 'AB Inputs' in data_dictionary:
+        return _read_legacy_json(data_dictionary)
+    abinputs = abinputs_from_dict(data_dictionary['Parameters'])
+    unit_class = units_from_dict(data_dictionary['Units'])
+    abresults = None
+    if 'Results' in data_dictionary:
+        _dd = data_dictionary['Results']
+        columns = {field: np.array(_dd[field], dtype=object) for field in ABWAVE_TEXT_FIELDS if field in _dd}
+        columns.update({field: np.array([np.nan if value is None else value for value in _dd[field]], dtype=float) for field in ABWAVE_RESULT_FIELDS if field in _dd})
+        abresults = ABWaveResultSet.from_columns(columns)
     return abinputs, abresults, unit_class
 
-def write_saved_file_json(abinputs:ABWaveInputData, abresults:dict[str,ABWaveResults], unit_class, data_filename:str):
-    data_dictionary = {}
-    data_dictionary['Units'] = {'Unit System': unit_class.name_unitsystem, 'Angle': unit_class.angle, 'Area': unit_class.area, 'Capacity': unit_class.capacity,
-                 'Concentration': unit_class.concentration, 'Density Gas': unit_class.density_gas, 'Density Liquid': unit_class.density_liquid, 'Density Solid': unit_class.density_solid, 
-                 'Diameter': unit_class.diameter, 'Force': unit_class.force, 'Length': unit_class.length, 'Mass': unit_class.mass, 'Mass Gradient': unit_class.mass_gradient, 
-                 'Mass Rate': unit_class.mass_rate, 'Permeability': unit_class.permeability, 'Power': unit_class.power, 'Pressure': unit_class.pressure, 'Pressure Gradient': unit_class.pressure_gradient, 
-                 'Temperature': unit_class.temperature, 'Velocity': unit_class.velocity, 'Visocisty': unit_class.viscosity, 'Volumetric Rate': unit_class.volumetric_rate}
-    data_dictionary['AB Inputs'] = {'Name': abinputs.name, 'Description': abinputs.description}
-    for key in abresults:
-        data_dictionary['AB Results'][key] = {'dune_height_ratio': abresults[key].dune_height_ratio}
+def write_saved_file_json(abinputs:ABWaveInputData, abresults, unit_class, data_filename:str):
+    #abresults: ABWaveResultSet, {key: ABWaveResults} or None, results are stored by column
+    data_dictionary = {'Parameters': abinputs_to_dict(abinputs), 'Units': units_to_dict(unit_class)}
+    abresults = _as_result_set(abresults)
+    if abresults is not None:
+        data_dictionary['Results'] = {field: list(abresults.column(field)) for field in ABWAVE_TEXT_FIELDS}
+        data_dictionary['Results'].update({field: [None if math.isnan(value) else float(value) for value in abresults.column(field)] for field in ABWAVE_RESULT_FIELDS})
     with open(data_filename, 'w',) as file:
-        json.dump(data_dictionary, file)
+        json.dump(data_dictionary, file, indent=4)
+    return
+
+def write_saved_file_csv(abresults, data_filename:str):
+    #one row per point with a header of field names, for spreadsheets and job scheduler post processing
+    abresults = _as_result_set(abresults) or ABWaveResultSet()
+    fields = ABWAVE_TEXT_FIELDS + ABWAVE_RESULT_FIELDS
+    with open(data_filename, 'w', newline='') as file:
+        writer = csv.writer(file)
+        writer.writerow(fields)
+        writer.writerows(zip(*[abresults.column(field) for field in fields]))
+    return
+
+def _binary_filename(data_filename:str):
+    #np.save appends .npy to any other name, both functions use the name it actually writes
+    return data_filename if data_filename.endswith('.npy') else data_filename + '.npy'
+
+def _binary_sidecar_filename(data_filename:str):
+    #<name>.npy.json, so it never replaces a json results file of the same stem
+    return _binary_filename(data_filename) + '.json'
+
+def write_saved_file_binary(abinputs:ABWaveInputData, abresults, unit_class, data_filename:str):
+    #large result sets: one float64 row per result field in a .npy file, so every column is contiguous on disk,
+    #plus a <name>.npy.json file with inputs, units and the text columns stored as categories and codes
+    data_filename = _binary_filename(data_filename)
+    abresults = _as_result_set(abresults) or ABWaveResultSet()
+    text_categories = {}
+    matrix = np.empty((len(ABWAVE_TEXT_FIELDS) + len(ABWAVE_RESULT_FIELDS), len(abresults)))
+    for row, field in enumerate(ABWAVE_TEXT_FIELDS):
+        categories = list(dict.fromkeys(abresults.column(field)))
+        codes = {category: code for code, category in enumerate(categories)}
+        matrix[row] = [codes[value] for value in abresults.column(field)]
+        text_categories[field] = categories
+    for row, field in enumerate(ABWAVE_RESULT_FIELDS, len(ABWAVE_TEXT_FIELDS)):
+        matrix[row] = abresults.column(field)
+    np.save(data_filename, matrix)
+    data_dictionary = {'Parameters': abinputs_to_dict(abinputs), 'Units': units_to_dict(unit_class),
+                       'Binary Results': {'file': os.path.basename(data_filename), 'fields': list(ABWAVE_TEXT_FIELDS + ABWAVE_RESULT_FIELDS), 'categories': text_categories}}
+    with open(_binary_sidecar_filename(data_filename), 'w',) as file:
+        json.dump(data_dictionary, file, indent=4)
     return
 
-def calc_AlphaBetaWave(ABParameters:ABWaveInputData, dune_height_ratio:float):
+def read_saved_file_binary(data_filename:str, mmap_mode:str='r'):
+    #numeric columns are memory mapped views into the .npy file, nothing is read until a column is used
+    data_filename = _binary_filename(data_filename)
+    with open(_binary_sidecar_filename(data_filename), 'r',) as file:
+        data_dictionary = json.load(file)
+    abinputs = abinputs_from_dict(data_dictionary['Parameters'])
+    unit_class = units_from_dict(data_dictionary['Units'])
+    _dd = data_dictionary['Binary Results']
+    matrix = np.load(data_filename, mmap_mode=mmap_mode)
+    columns = {}
+    for row, field in enumerate(_dd['fields']):
+        if field in _dd['categories']:
+            columns[field] = np.array(_dd['categories'][field], dtype=object)[matrix[row].astype(int)]
+        elif field in ABWAVE_RESULT_FIELDS:
+            columns[field] = matrix[row]
+    return abinputs, ABWaveResultSet.from_columns(columns), unit_class
+
+#geometry only depends on a few input fields and not on the transport model,
+#it is memoized with bounded LRU caches so several models on one completion only pay for it once
+#clean fluid dP is not, its rates are iterates that almost never repeat exactly, WashpipeScreenTable serves repeated washpipe-screen dP
+ABWAVE_GEOMETRY_CACHE_SIZE = 4096
+
+@functools.lru_cache(maxsize=ABWAVE_GEOMETRY_CACHE_SIZE)
+def _calc_alphawave_dune_height(openhole_id:float, screen_od:float, centralizer_od:float, dune_height_ratio:float):
+    return wec.calc_alphawave_dune_height(openhole_id, screen_od, centralizer_od, dune_height_ratio)
+
+@functools.lru_cache(maxsize=ABWAVE_GEOMETRY_CACHE_SIZE)
+def _calc_area(outer_diameter:float, inner_diameter:float):
+    return wec.calc_area(outer_diameter, inner_diameter)
+
+@functools.lru_cache(maxsize=ABWAVE_GEOMETRY_CACHE_SIZE)
+def _calc_eccentricity(inner_od:float, outer_id:float):
+    return wec.calc_eccentricity(inner_od, outer_id, 0)
+
+def _calc_washpipe_screen_dp(screen_id:float, washpipe_od:float, screen_roughness:float, fluid_density:float, fluid_viscosity:float,
+                             eccentricity_wp:float, nPrime:float, rate:float):
+    wp_screen_vel = wec.calc_fluid_velocity(rate, screen_id, washpipe_od)
+    NRe = wec.calc_NRe_newton(wp_screen_vel, screen_id - washpipe_od, fluid_density, fluid_viscosity)
+    wp_screen_ff = wec.calc_friction_colebrook(screen_id - washpipe_od, NRe, screen_roughness)
+    return wec.calc_DPf(wp_screen_ff, fluid_density, wp_screen_vel, screen_id - washpipe_od, 1) * wec.calc_eccentricity_factor_powerlaw(nPrime, NRe, screen_id, washpipe_od, eccentricity_wp)
+
+def _calc_washpipe_dp(washpipe_id:float, washpipe_roughness:float, fluid_density:float, fluid_viscosity:float, rate:float):
+    washpipe_velocity = wec.calc_fluid_velocity(rate, washpipe_id)
+    NRe = wec.calc_NRe_newton(washpipe_velocity, washpipe_id, fluid_density, fluid_viscosity)
+    washpipe_ff = wec.calc_friction_colebrook(washpipe_id, NRe, washpipe_roughness)
+    return wec.calc_DPf(washpipe_ff, fluid_density, washpipe_velocity, washpipe_id, 1)
+
+class WashpipeScreenTable():
+    #clean fluid washpipe-screen dP(q) per unit length for one screen, washpipe and fluid, tabulated once and inverted by linear interpolation
+    #dP(q) does not depend on dune height or transport model, so one table serves every point and model of a completion
+    #intervals are bisected until the rate interpolated at every interval midpoint is within tolerance:bpm of the true rate
+    def __init__(self, ABParameters:ABWaveInputData, max_rate:float=20.0, tolerance:float=0.001, min_rate:float=0.001, nPrime:float=1):
+        abp = ABParameters
+        self.key = (abp.screen_id, abp.washpipe_od, abp.screen_roughness, abp.fluid_density, abp.fluid_viscosity, _calc_eccentricity(abp.washpipe_od, abp.screen_id), nPrime)
+        self.tolerance = tolerance
+        self.rate = np.array([0.0])
+        self.dp = np.array([0.0])
+        self._extend(min_rate, max_rate)
+
+    def _calc_dp(self, rate:float):
+        return _calc_washpipe_screen_dp(*self.key, rate)
+
+    def _extend(self, start_rate:float, end_rate:float):
+        rates = list(np.geomspace(start_rate, end_rate, 65))
+        dps = [self._calc_dp(rate) for rate in rates]
+        i = 0
+        while i < len(rates) - 1:
+            rate_mid = 0.5 * (rates[i] + rates[i + 1])
+            dp_mid = self._calc_dp(rate_mid)
+            if dps[i + 1] > dps[i]:
+                rate_interp = rates[i] + (dp_mid - dps[i]) * (rates[i + 1] - rates[i]) / (dps[i + 1] - dps[i])
+            else:
+                rate_interp = rates[i]
+            if abs(rate_interp - rate_mid) > self.tolerance:
+                rates.insert(i + 1, rate_mid)
+                dps.insert(i + 1, dp_mid)
+            else:
+                i = i + 1
+        self.rate = np.concatenate([self.rate, rates])
+        self.dp = np.maximum.accumulate(np.concatenate([self.dp, dps]))     #friction regime changes must not break monotonicity
+
+    def _lookup(self, values, table_from:str, table_to:str):
+        #interpolates values on the table, extended until it covers the largest finite value, NaN for NaN and infinite values
+        values = np.asarray(values, dtype=float)
+        finite = np.isfinite(values)
+        if np.any(finite):
+            while np.max(values[finite]) > getattr(self, table_from)[-1]:
+                self._extend(self.rate[-1], 2 * self.rate[-1])
+        result = np.where(finite, np.interp(values, getattr(self, table_from), getattr(self, table_to)), np.nan)
+        return float(result) if np.ndim(result) == 0 else result
+
+    def rate_for_dp(self, dp):
+        #washpipe-screen rate:bpm giving dp, scalar or array, the table is extended if dp is beyond its last rate
+        return self._lookup(dp, 'dp', 'rate')
+
+    def dp_for_rate(self, rate):
+        return self._lookup(rate, 'rate', 'dp')
+
+@functools.lru_cache(maxsize=64)
+def _get_washpipe_screen_table(screen_id:float, washpipe_od:float, screen_roughness:float, fluid_density:float, fluid_viscosity:float):
+    return WashpipeScreenTable(ABWaveInputData('', '', 0, 0, 0, screen_id, screen_roughness, 0, washpipe_od, 0, 0, 0, 0, 0, 0, fluid_density, fluid_viscosity, ''))
+
+def get_washpipe_screen_table(ABParameters:ABWaveInputData):
+    #table for the screen, washpipe and fluid of ABParameters, built once per completion and shared between models
+    abp = ABParameters
+    return _get_washpipe_screen_table(abp.screen_id, abp.washpipe_od, abp.screen_roughness, abp.fluid_density, abp.fluid_viscosity)
+
+_ABWAVE_CACHES = {'geometry': _calc_alphawave_dune_height, 'area': _calc_area, 'eccentricity': _calc_eccentricity,
+                  'washpipe_screen_table': _get_washpipe_screen_table}
+
+def abwave_cache_info():
+    #hit/miss statistics of the memoized geometry and hydraulics, {cache name: {'hits', 'misses', 'maxsize', 'currsize'}}
+    return {name: cache.cache_info()._asdict() for name, cache in _ABWAVE_CACHES.items()}
+
+def clear_abwave_caches():
+    for cache in _ABWAVE_CACHES.values():
+        cache.cache_clear()
+
+def calc_washpipe_screen_dp(ABParameters:ABWaveInputData, rate:float, eccentricity_wp:float, nPrime:float=1):
+    #clean fluid friction dP per unit length between washpipe and screen at rate:bpm
+    abp = ABParameters
+    return _calc_washpipe_screen_dp(abp.screen_id, abp.washpipe_od, abp.screen_roughness, abp.fluid_density, abp.fluid_viscosity, eccentricity_wp, nPrime, rate)
+
+def calc_washpipe_dp(ABParameters:ABWaveInputData, rate:float):
+    #clean fluid friction dP per unit length inside the washpipe at rate:bpm
+    abp = ABParameters
+    return _calc_washpipe_dp(abp.washpipe_id, abp.washpipe_roughness, abp.fluid_density, abp.fluid_viscosity, rate)
+
+TRANSPORT_INPUTS = ('concentration', 'hydraulic_diameter', 'equivalent_diameter', 'dune_height', 'bed_width', 'wetted_perimeter', 'slurry_density')
+TRANSPORT_MODELS:dict[str,type] = {}
+
+class TransportModel(abc.ABC):
+    #critical transport velocity:ft/s above the dune, bound to one ABWaveInputData so values that do not change between iterations are computed once
+    #subclasses set name, depends_on: the per point values out of TRANSPORT_INPUTS the correlation reads, and implement arguments(),
+    #the correlation's arguments in order; correlation is any function of those arguments (or correlation_name, a wellengcalc function),
+    #models that are not one function call override velocity() and velocity_array() instead
+    #outer_concentration: the inner loop passes the sand concentration of the previous outer loop instead of the updated one
+    name:str = None
+    depends_on:tuple = ()
+    outer_concentration:bool = False
+    correlation = None
+    correlation_name:str = None     #looked up when bound, the SGS correlations are not in the published wellengcalc
+
+    def __init_subclass__(cls, **kwargs):
+        #a plain function set as correlation is kept as a function, not bound as a method of the model
+        super().__init_subclass__(**kwargs)
+        if 'correlation' in cls.__dict__ and cls.__dict__['correlation'] is not None and not isinstance(cls.__dict__['correlation'], staticmethod):
+            cls.correlation = staticmethod(cls.__dict__['correlation'])
+
+    def __init__(self, ABParameters:ABWaveInputData):
+        self.abp = ABParameters
+        self.solid_density = ABParameters.solid_density * 8.34      #ppg
+        if not self.available():
+            raise ValueError(f"Transport model '{self.name}' needs {self.correlation_name}, which is not in the installed wellengcalc")
+        if self.correlation_name is not None:
+            self.correlation = getattr(wec, self.correlation_name)
+
+    @classmethod
+    def available(cls):
+        #False when correlation_name is not in the installed wellengcalc
+        return cls.correlation_name is None or hasattr(wec, cls.correlation_name)
+
+    @abc.abstractmethod
+    def arguments(self, point:dict):
+        #tuple of the correlation's arguments for point, from point and self.abp
+        pass
+
+    def velocity(self, point:dict):
+        #point: {input: value} for the inputs in depends_on, scalars
+        return self.correlation(*self.arguments(point))
+
+    def velocity_array(self, point:dict):
+        #same with arrays of points, input data fields may be arrays of the same size
+        return _calc_array(self.correlation, *self.arguments(point))
+
+    def bind(self, ABParameters:ABWaveInputData):
+        #same model bound to other input data, e.g. the subset of a batch that is still iterating
+        return type(self)(ABParameters)
+
+def register_transport_model(model_class:type):
+    #class decorator, adds a TransportModel subclass under its name so ABWaveInputData.model can select it in every solver
+    for point_input in model_class.depends_on:
+        if point_input not in TRANSPORT_INPUTS:
+            raise ValueError(f"'{point_input}' is not a transport input, use one of {TRANSPORT_INPUTS}")
+    TRANSPORT_MODELS[model_class.name] = model_class
+    return model_class
+
+def get_transport_model(ABParameters:ABWaveInputData):
+    #model of ABParameters.model bound to ABParameters
+    if ABParameters.model not in TRANSPORT_MODELS:
+        raise ValueError(f"Unknown transport model '{ABParameters.model}', use one of {list(TRANSPORT_MODELS)}")
+    return TRANSPORT_MODELS[ABParameters.model](ABParameters)
+
+@register_transport_model
+class SGSTransport(TransportModel):
+    name = 'SGS'
+    depends_on = ('equivalent_diameter', 'concentration', 'dune_height')
+    correlation_name = 'calc_horizontal_transport_SGS'
+
+    def arguments(self, point:dict):
+        abp = self.abp
+        return (point['equivalent_diameter'], abp.solid_diameter, self.solid_density, abp.fluid_density, abp.fluid_viscosity, point['concentration'], point['dune_height'], abp.openhole_id)
+
+@register_transport_model
+class SGSAltTransport(TransportModel):
+    name = 'SGS alt'
+    depends_on = ('equivalent_diameter', 'concentration', 'bed_width', 'wetted_perimeter')
+    correlation_name = 'calc_horizontal_transport_SGS_alt'
+
+    def arguments(self, point:dict):
+        abp = self.abp
+        return (point['equivalent_diameter'], abp.solid_diameter, self.solid_density, abp.fluid_density, abp.fluid_viscosity, point['concentration'], point['bed_width'], point['wetted_perimeter'])
+
+@register_transport_model
+class OroskarTransport(TransportModel):
+    name = 'Oroskar'
+    depends_on = ('equivalent_diameter', 'concentration')
+    outer_concentration = True
+    correlation_name = 'calc_horizontal_transport_Oroskar'
+
+    def arguments(self, point:dict):
+        abp = self.abp
+        return (point['equivalent_diameter'], abp.solid_diameter, self.solid_density, abp.fluid_density, abp.fluid_viscosity, point['concentration'])
+
+@register_transport_model
+class OroskarModTransport(OroskarTransport):
+    name = 'Oroskar mod'
+    outer_concentration = False
+    correlation_name = 'calc_horizontal_transport_OroskarMod'
+
+@register_transport_model
+class HangTransport(TransportModel):
+    name = 'Hang'
+    depends_on = ('hydraulic_diameter', 'slurry_density')
+    correlation_name = 'calc_horizontal_transport_Hang'
+
+    def arguments(self, point:dict):
+        abp = self.abp
+        return (point['hydraulic_diameter'], abp.solid_diameter, self.solid_density, abp.fluid_density, point['slurry_density'], abp.fluid_viscosity)
+
+SOLVER_PHASES = ('geometry', 'slurry', 'transport', 'friction')
+
+class SolverStats():
+    #opt-in record of one solve, pass an instance as stats to calc_AlphaBetaWave or calc_AlphaBetaWave_batch
+    #batch solves store iteration counts, residuals and converged flags as arrays with one value per point
+    def __init__(self):
+        self.model = None
+        self.dune_height_ratio = None
+        self.outer_iterations = 0
+        self.inner_iterations = 0           #total over every outer loop
+        self.residual_rate = None           #last washpipe-screen rate change:bpm, converged below 0.01
+        self.residual_concentration = None  #last sand concentration change, converged below 0.001
+        self.residual_dp = None             #screen-openhole dP minus washpipe-screen dP at the solution
+        self.converged = None
+        self.cached = False
+        self.timings = {phase: 0.0 for phase in SOLVER_PHASES}      #seconds
+        self._lap_start = None
+
+    def start(self):
+        self._lap_start = time.perf_counter()
+
+    def lap(self, phase:str):
+        #time since the previous lap is charged to phase
+        now = time.perf_counter()
+        self.timings[phase] = self.timings[phase] + now - self._lap_start
+        self._lap_start = now
+
+class _NullSolverStats():
+    #stands in when no stats are requested so the solver does not branch on every lap
+    def start(self):
+        pass
+    def lap(self, phase:str):
+        pass
+
+_NULL_SOLVER_STATS = _NullSolverStats()
+
+def summarize_solver_stats(solver_stats:list[SolverStats]):
+    #aggregate of many scalar or batch SolverStats, e.g. collected over a sweep, totals and spread per transport model
+    summary = {'points': 0, 'cached': 0, 'not_converged': [], 'timings': {phase: 0.0 for phase in SOLVER_PHASES}, 'models': {}}
+    for stats in solver_stats:
+        dhr = np.ravel(stats.dune_height_ratio)
+        model = summary['models'].setdefault(stats.model, {'points': 0, 'cached': 0, 'inner_iterations': [], 'outer_iterations': [], 'not_converged': 0})
+        summary['points'] = summary['points'] + dhr.size
+        model['points'] = model['points'] + dhr.size
+        for phase in SOLVER_PHASES:
+            summary['timings'][phase] = summary['timings'][phase] + stats.timings[phase]
+        if stats.cached:
+            summary['cached'] = summary['cached'] + dhr.size
+            model['cached'] = model['cached'] + dhr.size
+            continue
+        model['inner_iterations'].extend(np.broadcast_to(stats.inner_iterations, dhr.shape).tolist())
+        model['outer_iterations'].extend(np.broadcast_to(stats.outer_iterations, dhr.shape).tolist())
+        converged = np.broadcast_to(stats.converged, dhr.shape)
+        for ratio in dhr[~converged]:
+            summary['not_converged'].append((stats.model, float(ratio)))
+        model['not_converged'] = model['not_converged'] + int(np.count_nonzero(~converged))
+    for model in summary['models'].values():
+        for counter in ('inner_iterations', 'outer_iterations'):
+            values = np.array(model.pop(counter), dtype=float)
+            model[counter] = {'total': int(values.sum()), 'mean': float(values.mean()) if values.size else 0.0, 'max': int(values.max()) if values.size else 0}
+    summary['total_time'] = sum(summary['timings'].values())
+    return summary
+
+def calc_AlphaBetaWave(ABParameters:ABWaveInputData, dune_height_ratio:float, initial_rate:float=None, initial_concentration:float=None, derivative:str='fd', dp_table=None, result_cache=None, stats:SolverStats=None):
     #openhole_id,openhole_roughness,screen_od,screen_id,screen_roughness,centralizer_od,washpipe_od,washpipe_id,washpipe_roughness,solid_diameter:in 
     #solid_density,solid_loading,fluid_density:ppg      solid_absVol: fluid_viscosity:cP, dune_height_ratio:dimensionless 
     #solid_density:SG     
-    
+    #initial_rate:bpm, initial_concentration: optional warm start for the washpipe-screen rate and sand concentration, e.g. from a neighbouring dune height ratio
+    #derivative: 'fd' for a forward difference dP/dq each iteration, 'secant' to reuse the previous iterate (one friction evaluation per iteration)
+    #dp_table: optional WashpipeScreenTable for these inputs, replaces the Newton iteration on the washpipe-screen rate with a table lookup
+    #result_cache: optional abwave_cache.ResultCache, consulted before solving and updated after
+    #stats: optional SolverStats filled with iteration counts, residuals, convergence and per phase timing
+    output, c = _solve_AlphaBetaWave(ABParameters, dune_height_ratio, initial_rate, initial_concentration, derivative, dp_table, result_cache, stats)
+    return output
+
+def _solve_AlphaBetaWave(ABParameters:ABWaveInputData, dune_height_ratio:float, initial_rate:float=None, initial_concentration:float=None, derivative:str='fd', dp_table=None, result_cache=None, stats:SolverStats=None,
+                         transport:TransportModel=None):
+    #returns results and the converged sand concentration, which is what a warm start needs for the next point
+    #transport: the model bound to ABParameters, solvers of many points bind it once and pass it to every point
+    if derivative not in ('fd', 'secant'):
+        raise ValueError(f"Unknown derivative '{derivative}', use 'fd' or 'secant'")
+    if stats is not None:
+        stats.model = ABParameters.model
+        stats.dune_height_ratio = dune_height_ratio
+    if result_cache is not None:
+        #entries stored by the batch solver have no concentration, they are solved again so warm starts have one, and the store below completes them
+        cached = result_cache.lookup(ABParameters, dune_height_ratio, derivative, dp_table is not None)
+        if cached is not None and cached[1] is not None:
+            if stats is not None:
+                stats.cached = True
+            return cached
+    timer = _NULL_SOLVER_STATS if stats is None else stats
+    timer.start()
     nPrime = 1
     kPrime = 0.00002088         #need to include as user variables eventually
     abp = ABParameters
+    transport = transport or get_transport_model(abp)
     #calculate geometry of wellbore with dune
     #eccentricity_wp = (screen_id - washpipe_od) / (screen_id - washpipe_od)
-    eccentricity_wp = wec.calc_eccentricity(abp.washpipe_od,abp.screen_id, 0)
+    eccentricity_wp = _calc_eccentricity(abp.washpipe_od, abp.screen_id)
     dune_height = dune_height_ratio * abp.openhole_id
-    hydraulic_diameter, equivalent_diameter, area_o, area_i, perimeter_o, perimeter_i, width_o, width_i = wec.calc_alphawave_dune_height(abp.openhole_id, abp.screen_od, abp.centralizer_od, dune_height_ratio)
+    hydraulic_diameter, equivalent_diameter, area_o, area_i, perimeter_o, perimeter_i, width_o, width_i = _calc_alphawave_dune_height(abp.openhole_id, abp.screen_od, abp.centralizer_od, dune_height_ratio)
     flow_area = area_o - area_i
     bed_width = width_o - width_i
     wetted_perimeter = perimeter_o + perimeter_i 
+    timer.lap('geometry')
 
     #calculate slurry properties
-    full_open_annulus = wec.calc_area(abp.openhole_id, abp.screen_od)
-    solid_loading_oh = abp.solid_loading / (flow_area / full_open_annulus)    #first assumption is flow is evenly split based on area
-    c = solid_loading_oh / (abp.solid_density * 8.34 + solid_loading_oh)
+    if initial_concentration is None:
+        full_open_annulus = _calc_area(abp.openhole_id, abp.screen_od)
+        solid_loading_oh = abp.solid_loading / (flow_area / full_open_annulus)    #first assumption is flow is evenly split based on area
+        c = solid_loading_oh / (abp.solid_density * 8.34 + solid_loading_oh)
+    else:
+        c = initial_concentration
+        solid_loading_oh = c * abp.solid_density * 8.34 / (1 - c)
     slurry_viscosity = abp.fluid_viscosity * wec.calc_slurry_viscosity(solid_loading_oh, abp.solid_density * 8.34, abp.fluid_density)
     slurry_density = wec.calc_slurry_density(abp.fluid_density, abp.solid_absVol, solid_loading_oh)
+    timer.lap('slurry')
     
     #calculate transport rate
-    if abp.model == 'Oroskar':
-        transport_velocity = wec.calc_horizontal_transport_Oroskar(equivalent_diameter, abp.solid_diameter, abp.solid_density * 8.34, abp.fluid_density, abp.fluid_viscosity, c)
-    elif abp.model == 'Oroskar mod':
-        transport_velocity = wec.calc_horizontal_transport_OroskarMod(equivalent_diameter, abp.solid_diameter, abp.solid_density * 8.34, abp.fluid_density, abp.fluid_viscosity, c)
-    elif abp.model == 'Hang':
-        transport_velocity = wec.calc_horizontal_transport_Hang(hydraulic_diameter, abp.solid_diameter, abp.solid_density * 8.34, abp.fluid_density, slurry_density, abp.fluid_viscosity)
+    point = {'concentration': c, 'hydraulic_diameter': hydraulic_diameter, 'equivalent_diameter': equivalent_diameter, 'dune_height': dune_height,
+             'bed_width': bed_width, 'wetted_perimeter': wetted_perimeter, 'slurry_density': slurry_density}
+    transport_velocity = transport.velocity(point)
+    timer.lap('transport')
     
     #calculate pressure drop at given rate above dune
-    screen_oh_rate = ucon(transport_velocity * flow_area / 144, 'ft\u00b3', 'bbl') * 60
+    screen_oh_rate = ucon(transport_velocity * flow_area / 144, 'ft³', 'bbl') * 60
     NRe = wec.calc_NRe_newton(transport_velocity, hydraulic_diameter, slurry_density, slurry_viscosity)
     alpha_ff = wec.calc_friction_colebrook(hydraulic_diameter, NRe, abp.openhole_roughness)     #friction factor above dune
     screen_oh_dp = wec.calc_DPf(alpha_ff, slurry_density, transport_velocity, hydraulic_diameter, 1)
+    timer.lap('friction')
     
     #inner loop finds rates to satisfy dPscr_oh = dPwp_scr with Newton-Raphson method
     #outer loop verifies that change in sand concentration is low once fluid rates are solved
     exit_converged_c = 1      #exits if converged
     loop_counter_c = 1        #limits number of loops to prevent lockup
+    q1 = initial_rate
+    q_prev = None             #previous iterate and its dP for the secant derivative, dPwp_scr(q) does not change between outer loops
+    dq = 0.001                #bpm
+    inner_iterations = 0
     while abs(exit_converged_c) > 0.001 and loop_counter_c < 100:    #final check if sand concentration change is small
         exit_converged_dP = 1      #exits if converged
         loop_counter = 1        #limits number of loops to prevent lockup
-        q1 = screen_oh_rate     #bpm
-        dq = 0.001              #bpm
+        if q1 is None or initial_rate is None:
+            q1 = screen_oh_rate     #bpm
         while abs(exit_converged_dP) > 0.01 and loop_counter < 100:     #dPscr_oh = dPwp_scr(q)
-            #first estimate, q = q_wp_scr
-            q = q1
+            if dp_table is not None:
+                #washpipe-screen rate read directly from the inverted dP(q) table
+                q2 = dp_table.rate_for_dp(screen_oh_dp)
+            else:
+                #first estimate, q = q_wp_scr
+                wp_screen_dp1 = calc_washpipe_screen_dp(abp, q1, eccentricity_wp, nPrime)
 
-            wp_screen_vel = wec.calc_fluid_velocity(q, abp.screen_id,abp. washpipe_od)
-            NRe = wec.calc_NRe_newton(wp_screen_vel, abp.screen_id - abp.washpipe_od, abp.fluid_density, abp.fluid_viscosity)
-            wp_screen_ff = wec.calc_friction_colebrook(abp.screen_id - abp.washpipe_od, NRe, abp.screen_roughness)
-            wp_screen_dp1 = wec.calc_DPf(wp_screen_ff, abp.fluid_density, wp_screen_vel, abp.screen_id - abp.washpipe_od, 1) * wec.calc_eccentricity_factor_powerlaw(nPrime, NRe, abp.screen_id, abp.washpipe_od, eccentricity_wp)
+                #slope from the previous iterate, or a second calc at q1 + dq
+                if derivative == 'secant' and q_prev is not None and abs(q1 - q_prev) > 1e-9:
+                    slope = (wp_screen_dp1 - wp_screen_dp_prev) / (q1 - q_prev)
+                else:
+                    wp_screen_dp2 = calc_washpipe_screen_dp(abp, q1 + dq, eccentricity_wp, nPrime)
+                    slope = (wp_screen_dp2 - wp_screen_dp1) / dq
+                q_prev = q1
+                wp_screen_dp_prev = wp_screen_dp1
 
-            #NRe = wec.calc_NRe_newton(wec.calc_fluid_velocity(q, washpipe_od, screen_id), screen_id - washpipe_od, fluid_density, fluid_viscosity)
-            #wp_screen_ff = wec.calc_friction_colebrook(screen_id - washpipe_od, NRe, screen_roughness)
-            #wp_screen_dp1 = wec.calc_DPf(wp_screen_ff, fluid_density, wec.calc_fluid_velocity(q, washpipe_od, screen_id), screen_id - washpipe_od, 1) * wec.calc_eccentricity_factor_powerlaw(nPrime, NRe, screen_id, washpipe_od, eccentricity_wp)
-            
-            #second calc, q2
-            q = q1 + dq
-            
-            wp_screen_vel = wec.calc_fluid_velocity(q, abp.screen_id, abp.washpipe_od)
-            NRe = wec.calc_NRe_newton(wp_screen_vel, abp.screen_id - abp.washpipe_od, abp.fluid_density, abp.fluid_viscosity)
-            wp_screen_ff = wec.calc_friction_colebrook(abp.screen_id - abp.washpipe_od, NRe, abp.screen_roughness)
-            wp_screen_dp2 = wec.calc_DPf(wp_screen_ff, abp.fluid_density, wp_screen_vel, abp.screen_id - abp.washpipe_od, 1) * wec.calc_eccentricity_factor_powerlaw(nPrime, NRe, abp.screen_id, abp.washpipe_od, eccentricity_wp)
-
-            #NRe = wec.calc_NRe_newton(wec.calc_fluid_velocity(q, washpipe_od, screen_id), screen_id - washpipe_od, fluid_density, fluid_viscosity)
-            #wp_screen_ff = wec.calc_friction_colebrook(screen_id - washpipe_od, NRe, screen_roughness)
-            #wp_screen_dp2 = wec.calc_DPf(wp_screen_ff, fluid_density, wec.calc_fluid_velocity(q, washpipe_od, screen_id), screen_id - washpipe_od, 1) * wec.calc_eccentricity_factor_powerlaw(nPrime, NRe, screen_id, washpipe_od, eccentricity_wp)
-
-            y1 = screen_oh_dp - wp_screen_dp1
-            y2 = screen_oh_dp - wp_screen_dp2
-            q2 = q1 - y1 / ((y2 - y1) / dq)
+                y1 = screen_oh_dp - wp_screen_dp1
+                q2 = q1 + y1 / slope
             exit_converged_dP = q2 - q1
             loop_counter = loop_counter + 1
             q1 = q2
+            timer.lap('friction')
 
             #calculate new proppant loading based on fluid rates from dP, and update calculations above dune
             solid_loading_oh = abp.solid_loading * (screen_oh_rate + q1) / screen_oh_rate
             c1 = solid_loading_oh / (abp.solid_density * 8.34 + solid_loading_oh)
             slurry_viscosity = abp.fluid_viscosity * wec.calc_slurry_viscosity(solid_loading_oh, abp.solid_density * 8.34, abp.fluid_density)
             slurry_density = wec.calc_slurry_density(abp.fluid_density, abp.solid_absVol, solid_loading_oh)
+            timer.lap('slurry')
 
-            if abp.model == 'SGS':
-                transport_velocity = wec.calc_horizontal_transport_SGS(equivalent_diameter, abp.solid_diameter, abp.solid_density * 8.34, abp.fluid_density, abp.fluid_viscosity, c1, dune_height, abp.openhole_id)
-            elif abp.model == 'SGS alt':
-                transport_velocity = wec.calc_horizontal_transport_SGS_alt(equivalent_diameter, abp.solid_diameter, abp.solid_density * 8.34, abp.fluid_density, abp.fluid_viscosity, c1, width_o - width_i, perimeter_o + perimeter_i)
-            elif abp.model == 'Oroskar':
-                transport_velocity = wec.calc_horizontal_transport_Oroskar(equivalent_diameter, abp.solid_diameter, abp.solid_density * 8.34, abp.fluid_density, abp.fluid_viscosity, c)
-            elif abp.model == 'Oroskar mod':
-                transport_velocity = wec.calc_horizontal_transport_OroskarMod(equivalent_diameter, abp.solid_diameter, abp.solid_density * 8.34, abp.fluid_density, abp.fluid_viscosity, c1)
-            elif abp.model == 'Hang':
-                transport_velocity = wec.calc_horizontal_transport_Hang(hydraulic_diameter, abp.solid_diameter, abp.solid_density * 8.34, abp.fluid_density, slurry_density, abp.fluid_viscosity)
+            point['concentration'] = c if transport.outer_concentration else c1
+            point['slurry_density'] = slurry_density
+            transport_velocity = transport.velocity(point)
+            timer.lap('transport')
             
-            screen_oh_rate = ucon(transport_velocity * flow_area / 144, 'ft\u00b3', 'bbl') * 60
+            screen_oh_rate = ucon(transport_velocity * flow_area / 144, 'ft³', 'bbl') * 60
             NRe = wec.calc_NRe_newton(transport_velocity, hydraulic_diameter, slurry_density, slurry_viscosity)
             alpha_ff = wec.calc_friction_colebrook(hydraulic_diameter, NRe, abp.openhole_roughness)
             screen_oh_dp = wec.calc_DPf(alpha_ff, slurry_density, transport_velocity, hydraulic_diameter, 1)
+            timer.lap('friction')
             
+        inner_iterations = inner_iterations + loop_counter - 1
         loop_counter_c = loop_counter_c + 1
         exit_converged_c = c1 - c
         c = c1
 
     #calculate final washpipe-screen dP
     wp_screen_rate = q1
-    wp_screen_velocity = wec.calc_fluid_velocity(wp_screen_rate, abp.screen_id, abp.washpipe_od)
-    NRe = wec.calc_NRe_newton(wp_screen_velocity, abp.screen_id - abp.washpipe_od, abp.fluid_density, abp.fluid_viscosity)
-    wp_screen_ff = wec.calc_friction_colebrook(abp.screen_id - abp.washpipe_od, NRe, abp.screen_roughness)
-    washpipe_screen_dp = wec.calc_DPf(wp_screen_ff, abp.fluid_density, wp_screen_velocity, abp.screen_id - abp.washpipe_od, 1) * wec.calc_eccentricity_factor_powerlaw(nPrime, NRe, abp.screen_id, abp.washpipe_od, eccentricity_wp)
+    washpipe_screen_dp = calc_washpipe_screen_dp(abp, wp_screen_rate, eccentricity_wp, nPrime)
     
     #with rates solved, allow for losses in reported input rate
     leakoff_rate = 0
@@ -230,39 +770,395 @@ def calc_AlphaBetaWave(ABParameters:ABWaveInputData, dune_height_ratio:float):
     pump_rate = screen_oh_rate + wp_screen_rate + leakoff_rate
 
     #solve for beta wave with pump rate
-    wp_screen_velocity_beta = wec.calc_fluid_velocity(pump_rate, abp.screen_id, abp.washpipe_od)
-    NRe = wec.calc_NRe_newton(wp_screen_velocity, abp.screen_id - abp.washpipe_od, abp.fluid_density, abp.fluid_viscosity)
-    wp_screen_ff_beta = wec.calc_friction_colebrook(abp.screen_id - abp.washpipe_od, NRe, abp.screen_roughness)
-    washpipe_screen_dp_beta = wec.calc_DPf(wp_screen_ff_beta, abp.fluid_density, wp_screen_velocity_beta, abp.screen_id - abp.washpipe_od, 1) * wec.calc_eccentricity_factor_powerlaw(nPrime, NRe, abp.screen_id, abp.washpipe_od, eccentricity_wp)
+    washpipe_screen_dp_beta = calc_washpipe_screen_dp(abp, pump_rate, eccentricity_wp, nPrime)
 
     #solve for washpipe dP with return rate
-    washpipe_velocity = wec.calc_fluid_velocity(return_rate, abp.washpipe_id)
-    NRe = wec.calc_NRe_newton(washpipe_velocity, abp.washpipe_id, abp.fluid_density, abp.fluid_viscosity)
-    washpipe_ff = wec.calc_friction_colebrook(abp.washpipe_id, NRe, abp.washpipe_roughness)
-    washpipe_dp = wec.calc_DPf(washpipe_ff, abp.fluid_density, washpipe_velocity, abp.washpipe_id, 1)
+    washpipe_dp = calc_washpipe_dp(abp, return_rate)
+    timer.lap('friction')
 
     #with overall pump rate, calculate full open dP with clean fluid
+    if stats is not None:
+        stats.outer_iterations = loop_counter_c - 1
+        stats.inner_iterations = inner_iterations
+        stats.residual_rate = exit_converged_dP
+        stats.residual_concentration = exit_converged_c
+        stats.residual_dp = screen_oh_dp - washpipe_screen_dp
+        stats.converged = abs(exit_converged_dP) <= 0.01 and abs(exit_converged_c) <= 0.001
     
     output = ABWaveResults(abp.name, abp.description, dune_height_ratio, dune_height, hydraulic_diameter, equivalent_diameter, area_o, area_i, perimeter_o, perimeter_i, width_o, width_i, 
-                            transport_velocity, screen_oh_rate, wp_screen_rate, pump_rate, return_rate, screen_oh_dp, washpipe_screen_dp)
-    return output
+                            transport_velocity, screen_oh_rate, wp_screen_rate, pump_rate, return_rate, screen_oh_dp, washpipe_screen_dp, washpipe_screen_dp_beta, washpipe_dp, abp.model)
+    if result_cache is not None:
+        result_cache.store(abp, dune_height_ratio, derivative, dp_table is not None, output, c)
+    return output, c
+
+def calc_AlphaBetaWave_continuation(ABParameters:ABWaveInputData, dune_height_ratios:list[float], extrapolate:bool=True, derivative:str='secant', dp_table=None, result_cache=None, solver_stats:list=None):
+    #solves a sweep of dune height ratios in order, each point starts from the converged washpipe-screen rate and sand concentration
+    #of the previous point, linearly extrapolated from the two previous points if extrapolate is set
+    #returns {dune_height_ratio: ABWaveResults}, same as building the curve with calc_AlphaBetaWave
+    #solver_stats: optional list, one SolverStats per point is appended to it
+    results:dict[float,ABWaveResults] = {}
+    history = []        #(dune_height_ratio, washpipe_screen_rate, concentration) of solved points
+    transport = get_transport_model(ABParameters)
+    for dhr in dune_height_ratios:
+        initial_rate = initial_concentration = None
+        if history:
+            x1, q1, c1 = history[-1]
+            initial_rate, initial_concentration = q1, c1
+            if extrapolate and len(history) > 1 and history[-2][0] != x1:
+                x0, q0, c0 = history[-2]
+                slope = (dhr - x1) / (x1 - x0)
+                initial_rate = q1 + (q1 - q0) * slope
+                initial_concentration = c1 + (c1 - c0) * slope
+                if not 0 < initial_concentration < 1:
+                    initial_concentration = c1
+        stats = None
+        if solver_stats is not None:
+            stats = SolverStats()
+            solver_stats.append(stats)
+        output, c = _solve_AlphaBetaWave(ABParameters, dhr, initial_rate, initial_concentration, derivative, dp_table, result_cache, stats, transport)
+        results[dhr] = output
+        history.append((dhr, output.washpipe_screen_rate, c))
+    return results
+
+ADAPTIVE_FIELDS = ('pump_rate', 'screen_oh_dp', 'washpipe_screen_dp', 'washpipe_screen_dp_beta', 'washpipe_dp')
+
+def _interpolation_error(results_a:ABWaveResults, results_b:ABWaveResults, results_mid:ABWaveResults, fields:tuple):
+    #largest relative error of the linear interpolation between a and b at the solved midpoint
+    error = 0.0
+    for field in fields:
+        value_a, value_b, value_mid = getattr(results_a, field), getattr(results_b, field), getattr(results_mid, field)
+        if value_a is None or value_b is None or value_mid is None:
+            continue
+        error = max(error, abs((value_a + value_b) / 2 - value_mid) / max(abs(value_mid), 1e-9))
+    return error
+
+def calc_AlphaBetaWave_adaptive(ABParameters:ABWaveInputData, bounds:tuple=(0.5, 0.875), tolerance:float=0.005, initial_points:int=5, min_interval:float=0.002,
+                                max_points:int=129, fields:tuple=ADAPTIVE_FIELDS, output_ratios=None, derivative:str='secant', dp_table=None, result_cache=None, solver_stats:list=None):
+    #alpha wave curve between bounds sampled where it bends: starts from initial_points evenly spaced ratios and bisects every interval
+    #whose midpoint differs from the linear interpolation of its ends by more than tolerance, relative, in any of fields
+    #intervals are refined breadth first until they pass, are narrower than min_interval or max_points have been solved
+    #each midpoint warm starts from the washpipe-screen rate and sand concentration interpolated between its ends
+    #returns an ABWaveResultSet sorted by dune height ratio, or the curve interpolated at output_ratios (a list, or a number of evenly spaced ratios)
+    points:dict[float,tuple] = {}        #dune_height_ratio: (ABWaveResults, concentration)
+    transport = get_transport_model(ABParameters)
+
+    def solve(dhr:float, initial_rate:float=None, initial_concentration:float=None):
+        stats = None
+        if solver_stats is not None:
+            stats = SolverStats()
+            solver_stats.append(stats)
+        points[dhr] = _solve_AlphaBetaWave(ABParameters, dhr, initial_rate, initial_concentration, derivative, dp_table, result_cache, stats, transport)
+
+    #the coarse points are too far apart to warm start from each other reliably, the Oroskar iteration can settle on another solution
+    grid = [float(dhr) for dhr in np.linspace(bounds[0], bounds[1], max(initial_points, 2))]
+    for dhr in grid:
+        solve(dhr)
+
+    intervals = deque(zip(grid[:-1], grid[1:]))
+    while intervals and len(points) < max_points:
+        a, b = intervals.popleft()
+        if b - a < 2 * min_interval:
+            continue
+        mid = (a + b) / 2
+        (output_a, c_a), (output_b, c_b) = points[a], points[b]
+        solve(mid, (output_a.washpipe_screen_rate + output_b.washpipe_screen_rate) / 2, (c_a + c_b) / 2)
+        if _interpolation_error(output_a, output_b, points[mid][0], fields) > tolerance:
+            intervals.append((a, mid))
+            intervals.append((mid, b))
+
+    curve = ABWaveResultSet([points[dhr][0] for dhr in sorted(points)])
+    if output_ratios is None:
+        return curve
+    if np.ndim(output_ratios) == 0:
+        output_ratios = np.linspace(bounds[0], bounds[1], int(output_ratios))
+    return interpolate_alphawave_curve(curve, output_ratios)
+
+def interpolate_alphawave_curve(alphawave_curve:ABWaveResultSet, dune_height_ratios):
+    #every result field linearly interpolated at dune_height_ratios from a curve sorted by dune height ratio, e.g. a fine curve
+    #from calc_AlphaBetaWave_adaptive without solving it
+    dune_height_ratios = np.asarray(dune_height_ratios, dtype=float)
+    x = alphawave_curve.column('dune_height_ratio')
+    columns = {field: np.interp(dune_height_ratios, x, alphawave_curve.column(field)) for field in ABWAVE_RESULT_FIELDS}
+    for field in ABWAVE_TEXT_FIELDS:
+        columns[field] = np.full(dune_height_ratios.size, alphawave_curve.column(field)[0] if len(alphawave_curve) else None, dtype=object)
+    return ABWaveResultSet.from_columns(columns)
+
+def _find_root_brent(func, a:float, b:float, fa:float, fb:float, tolerance:float, max_iterations:int=100):
+    #Brent's method on a bracket [a, b] with func(a) and func(b) of opposite sign, returns the root to tolerance
+    c, fc = b, fb
+    d = e = b - a
+    for _ in range(max_iterations):
+        if fb * fc > 0:
+            c, fc = a, fa
+            d = e = b - a
+        if abs(fc) < abs(fb):
+            a, b, c = b, c, b
+            fa, fb, fc = fb, fc, fb
+        tol1 = 2 * np.finfo(float).eps * abs(b) + 0.5 * tolerance
+        xm = 0.5 * (c - b)
+        if abs(xm) <= tol1 or fb == 0:
+            return b
+        if abs(e) >= tol1 and abs(fa) > abs(fb):
+            s = fb / fa
+            if a == c:      #secant step
+                p = 2 * xm * s
+                q = 1 - s
+            else:           #inverse quadratic interpolation
+                q = fa / fc
+                r = fb / fc
+                p = s * (2 * xm * q * (q - r) - (b - a) * (r - 1))
+                q = (q - 1) * (r - 1) * (s - 1)
+            if p > 0:
+                q = -q
+            p = abs(p)
+            if 2 * p < min(3 * xm * q - abs(tol1 * q), abs(e * q)):
+                e = d
+                d = p / q
+            else:           #interpolation failed, bisect
+                d = e = xm
+        else:
+            d = e = xm
+        a, fa = b, fb
+        b = b + d if abs(d) > tol1 else b + math.copysign(tol1, xm)
+        fb = func(b)
+    return b
+
+class _PumpRateSolver():
+    #keeps every solved dune height ratio so later evaluations, and later pump rates, warm start from the nearest solved point
+    def __init__(self, ABParameters:ABWaveInputData, derivative:str='secant'):
+        self.abp = ABParameters
+        self.derivative = derivative
+        self.transport = get_transport_model(ABParameters)
+        self.points:dict[float,tuple] = {}        #dune_height_ratio: (ABWaveResults, concentration)
+
+    def evaluate(self, dune_height_ratio:float):
+        if dune_height_ratio not in self.points:
+            initial_rate = initial_concentration = None
+            if self.points:
+                nearest = min(self.points, key=lambda dhr: abs(dhr - dune_height_ratio))
+                initial_rate = self.points[nearest][0].washpipe_screen_rate
+                initial_concentration = self.points[nearest][1]
+            self.points[dune_height_ratio] = _solve_AlphaBetaWave(self.abp, dune_height_ratio, initial_rate, initial_concentration, self.derivative, transport=self.transport)
+        return self.points[dune_height_ratio][0]
+
+    def solve(self, pump_rate:float, lower:float, upper:float, tolerance:float):
+        f_lower = self.evaluate(lower).pump_rate - pump_rate
+        f_upper = self.evaluate(upper).pump_rate - pump_rate
+        if f_lower * f_upper > 0:
+            raise ValueError(f"Pump rate {pump_rate} is not reached between dune height ratios {lower} and {upper}")
+        dhr = _find_root_brent(lambda x: self.evaluate(x).pump_rate - pump_rate, lower, upper, f_lower, f_upper, tolerance)
+        return self.evaluate(dhr)
+
+def solve_for_pump_rate(ABParameters:ABWaveInputData, pump_rate:float, bounds:tuple=(0.5, 0.875), tolerance:float=1e-4, derivative:str='secant'):
+    #dune height ratio where the alpha wave needs pump_rate:bpm, root found between bounds with Brent's method to tolerance on the ratio
+    #returns ABWaveResults at that ratio, washpipe_screen_dp_beta and washpipe_dp give the beta wave friction at the same rate
+    solver = _PumpRateSolver(ABParameters, derivative)
+    return solver.solve(pump_rate, bounds[0], bounds[1], tolerance)
+
+def solve_for_pump_rates(ABParameters:ABWaveInputData, pump_rates:list[float], bounds:tuple=(0.5, 0.875), tolerance:float=1e-4, samples:int=9, derivative:str='secant'):
+    #solve_for_pump_rate for many pump rates, a coarse curve of samples ratios is solved once to bracket every rate
+    #and all solves share the solved points; returns a list in the order of pump_rates, None where the rate is not reached within bounds
+    solver = _PumpRateSolver(ABParameters, derivative)
+    grid = [float(dhr) for dhr in np.linspace(bounds[0], bounds[1], samples)]
+    curve = [solver.evaluate(dhr).pump_rate for dhr in grid]
+    results = []
+    for pump_rate in pump_rates:
+        result = None
+        for i in range(len(grid) - 1):
+            if (curve[i] - pump_rate) * (curve[i + 1] - pump_rate) <= 0:
+                result = solver.solve(pump_rate, grid[i], grid[i + 1], tolerance)
+                break
+        results.append(result)
+    return results
+
+_SCALAR_ONLY_FUNCTIONS = set()
+
+def _calc_array(func, *args, nout:int=1):
+    #wec functions are written for scalars. Call them on whole arrays when they broadcast (plain arithmetic, numpy calls),
+    #otherwise fall back to mapping them element by element and remember not to try the array call again
+    #math.* calls and if branches raise on arrays of more than one point, so a scalar only function is never given a wrong array answer
+    args = np.broadcast_arrays(*[np.asarray(arg, dtype=float) for arg in args])
+    shape = args[0].shape
+    if func not in _SCALAR_ONLY_FUNCTIONS:
+        try:
+            with np.errstate(all='ignore'):
+                result = func(*args)
+            if nout == 1:
+                return np.broadcast_to(np.asarray(result, dtype=float), shape).copy()
+            return tuple(np.broadcast_to(np.asarray(value, dtype=float), shape).copy() for value in result)
+        except (TypeError, ValueError):
+            _SCALAR_ONLY_FUNCTIONS.add(func)
+    result = np.frompyfunc(func, len(args), nout)(*args)      #lighter per point than np.vectorize
+    if nout == 1:
+        return np.asarray(result, dtype=float).reshape(shape)
+    return tuple(np.asarray(value, dtype=float).reshape(shape) for value in result)
+
+def _take_inputs(ABParameters:ABWaveInputData, index):
+    #subset of array-valued input data, used to only evaluate points that have not converged yet
+    abp = ABParameters
+    return ABWaveInputData(abp.name, abp.description, *[getattr(abp, field)[index] for field in ABWAVE_NUMERIC_FIELDS], abp.model)
+
+def _calc_washpipe_screen_dp_array(abp:ABWaveInputData, q, eccentricity_wp, nPrime:float=1):
+    #clean fluid friction dP between washpipe and screen, per unit length, for arrays of rates
+    wp_screen_vel = _calc_array(wec.calc_fluid_velocity, q, abp.screen_id, abp.washpipe_od)
+    NRe = _calc_array(wec.calc_NRe_newton, wp_screen_vel, abp.screen_id - abp.washpipe_od, abp.fluid_density, abp.fluid_viscosity)
+    wp_screen_ff = _calc_array(wec.calc_friction_colebrook, abp.screen_id - abp.washpipe_od, NRe, abp.screen_roughness)
+    return (_calc_array(wec.calc_DPf, wp_screen_ff, abp.fluid_density, wp_screen_vel, abp.screen_id - abp.washpipe_od, 1)
+            * _calc_array(wec.calc_eccentricity_factor_powerlaw, nPrime, NRe, abp.screen_id, abp.washpipe_od, eccentricity_wp))
+
+def calc_AlphaBetaWave_batch(ABParameters:ABWaveInputData, dune_height_ratio, dp_table=None, stats:SolverStats=None):
+    #same solution as calc_AlphaBetaWave, for an array of dune height ratios at once
+    #numeric fields of ABParameters may also be arrays, they are broadcast against dune_height_ratio
+    #dp_table: optional WashpipeScreenTable, only valid when screen, washpipe and fluid fields are scalars
+    #points are frozen as they converge, only the remaining points are carried through the next iteration
+    #returns ABWaveResults with every value as an array in the broadcast shape
+    #stats: optional SolverStats, filled with one iteration count, residual and converged flag per point
+    timer = _NULL_SOLVER_STATS if stats is None else stats
+    timer.start()
+    nPrime = 1
+    shape = np.broadcast_shapes(np.shape(dune_height_ratio), *[np.shape(getattr(ABParameters, field)) for field in ABWAVE_NUMERIC_FIELDS])
+    dune_height_ratio = np.broadcast_to(np.asarray(dune_height_ratio, dtype=float), shape).ravel()
+    abp = ABWaveInputData(ABParameters.name, ABParameters.description,
+                          *[np.broadcast_to(np.asarray(getattr(ABParameters, field), dtype=float), shape).ravel() for field in ABWAVE_NUMERIC_FIELDS],
+                          ABParameters.model)
+    ft3_to_bbl = ucon(1, 'ft³', 'bbl')
+
+    #calculate geometry of wellbore with dune
+    eccentricity_wp = _calc_array(wec.calc_eccentricity, abp.washpipe_od, abp.screen_id, 0)
+    dune_height = dune_height_ratio * abp.openhole_id
+    hydraulic_diameter, equivalent_diameter, area_o, area_i, perimeter_o, perimeter_i, width_o, width_i = _calc_array(wec.calc_alphawave_dune_height, abp.openhole_id, abp.screen_od, abp.centralizer_od, dune_height_ratio, nout=8)
+    flow_area = area_o - area_i
+    bed_width = width_o - width_i
+    wetted_perimeter = perimeter_o + perimeter_i
+    timer.lap('geometry')
+
+    #calculate slurry properties
+    full_open_annulus = _calc_array(wec.calc_area, abp.openhole_id, abp.screen_od)
+    solid_loading_oh = abp.solid_loading / (flow_area / full_open_annulus)    #first assumption is flow is evenly split based on area
+    c = solid_loading_oh / (abp.solid_density * 8.34 + solid_loading_oh)
+    slurry_viscosity = abp.fluid_viscosity * _calc_array(wec.calc_slurry_viscosity, solid_loading_oh, abp.solid_density * 8.34, abp.fluid_density)
+    slurry_density = _calc_array(wec.calc_slurry_density, abp.fluid_density, abp.solid_absVol, solid_loading_oh)
+    timer.lap('slurry')
+
+    #calculate transport rate and pressure drop at given rate above dune
+    transport = get_transport_model(abp)
+    point = {'concentration': c, 'hydraulic_diameter': hydraulic_diameter, 'equivalent_diameter': equivalent_diameter, 'dune_height': dune_height,
+             'bed_width': bed_width, 'wetted_perimeter': wetted_perimeter, 'slurry_density': slurry_density}
+    transport_velocity = transport.velocity_array(point)
+    timer.lap('transport')
+    screen_oh_rate = transport_velocity * flow_area / 144 * ft3_to_bbl * 60
+    NRe = _calc_array(wec.calc_NRe_newton, transport_velocity, hydraulic_diameter, slurry_density, slurry_viscosity)
+    alpha_ff = _calc_array(wec.calc_friction_colebrook, hydraulic_diameter, NRe, abp.openhole_roughness)
+    screen_oh_dp = _calc_array(wec.calc_DPf, alpha_ff, slurry_density, transport_velocity, hydraulic_diameter, 1)
+    timer.lap('friction')
+
+    #same nested iteration as calc_AlphaBetaWave, every point in a pass starts together so one loop counter covers all of them
+    inner_iterations = np.zeros(dune_height_ratio.size, dtype=int)
+    outer_iterations = np.zeros(dune_height_ratio.size, dtype=int)
+    residual_rate = np.ones(dune_height_ratio.size)
+    residual_concentration = np.ones(dune_height_ratio.size)
+    c1 = c.copy()
+    q1 = np.zeros_like(c)
+    dq = 0.001              #bpm
+    active_c = np.arange(dune_height_ratio.size)
+    loop_counter_c = 1
+    while active_c.size > 0 and loop_counter_c < 100:
+        q1[active_c] = screen_oh_rate[active_c]
+        active = active_c
+        loop_counter = 1
+        while active.size > 0 and loop_counter < 100:
+            ap = _take_inputs(abp, active)
+            q = q1[active]
+            if dp_table is not None:
+                q2 = dp_table.rate_for_dp(screen_oh_dp[active])
+            else:
+                wp_screen_dp1 = _calc_washpipe_screen_dp_array(ap, q, eccentricity_wp[active], nPrime)
+                wp_screen_dp2 = _calc_washpipe_screen_dp_array(ap, q + dq, eccentricity_wp[active], nPrime)
+                y1 = screen_oh_dp[active] - wp_screen_dp1
+                y2 = screen_oh_dp[active] - wp_screen_dp2
+                q2 = q - y1 / ((y2 - y1) / dq)
+            exit_converged_dP = q2 - q
+            q1[active] = q2
+            inner_iterations[active] = inner_iterations[active] + 1
+            residual_rate[active] = exit_converged_dP
+            timer.lap('friction')
+
+            #calculate new proppant loading based on fluid rates from dP, and update calculations above dune
+            solid_loading_oh = ap.solid_loading * (screen_oh_rate[active] + q2) / screen_oh_rate[active]
+            c1[active] = solid_loading_oh / (ap.solid_density * 8.34 + solid_loading_oh)
+            slurry_viscosity[active] = ap.fluid_viscosity * _calc_array(wec.calc_slurry_viscosity, solid_loading_oh, ap.solid_density * 8.34, ap.fluid_density)
+            slurry_density[active] = _calc_array(wec.calc_slurry_density, ap.fluid_density, ap.solid_absVol, solid_loading_oh)
+            timer.lap('slurry')
+            active_point = {point_input: point[point_input][active] for point_input in transport.depends_on}
+            active_point['concentration'] = c[active] if transport.outer_concentration else c1[active]
+            active_point['slurry_density'] = slurry_density[active]
+            transport_velocity[active] = transport.bind(ap).velocity_array(active_point)
+            timer.lap('transport')
+
+            screen_oh_rate[active] = transport_velocity[active] * flow_area[active] / 144 * ft3_to_bbl * 60
+            NRe = _calc_array(wec.calc_NRe_newton, transport_velocity[active], hydraulic_diameter[active], slurry_density[active], slurry_viscosity[active])
+            alpha_ff = _calc_array(wec.calc_friction_colebrook, hydraulic_diameter[active], NRe, ap.openhole_roughness)
+            screen_oh_dp[active] = _calc_array(wec.calc_DPf, alpha_ff, slurry_density[active], transport_velocity[active], hydraulic_diameter[active], 1)
+            timer.lap('friction')
+
+            loop_counter = loop_counter + 1
+            active = active[np.abs(exit_converged_dP) > 0.01]
+
+        loop_counter_c = loop_counter_c + 1
+        exit_converged_c = c1[active_c] - c[active_c]
+        outer_iterations[active_c] = outer_iterations[active_c] + 1
+        residual_concentration[active_c] = exit_converged_c
+        c[active_c] = c1[active_c]
+        active_c = active_c[np.abs(exit_converged_c) > 0.001]
+
+    #calculate final washpipe-screen dP
+    wp_screen_rate = q1
+    washpipe_screen_dp = _calc_washpipe_screen_dp_array(abp, wp_screen_rate, eccentricity_wp, nPrime)
+
+    #with rates solved, allow for losses in reported input rate
+    leakoff_rate = 0
+    return_rate = screen_oh_rate + wp_screen_rate
+    pump_rate = screen_oh_rate + wp_screen_rate + leakoff_rate
+
+    #beta wave washpipe-screen dP with pump rate, washpipe dP with return rate
+    washpipe_screen_dp_beta = _calc_washpipe_screen_dp_array(abp, pump_rate, eccentricity_wp, nPrime)
+    washpipe_velocity = _calc_array(wec.calc_fluid_velocity, return_rate, abp.washpipe_id)
+    NRe = _calc_array(wec.calc_NRe_newton, washpipe_velocity, abp.washpipe_id, abp.fluid_density, abp.fluid_viscosity)
+    washpipe_ff = _calc_array(wec.calc_friction_colebrook, abp.washpipe_id, NRe, abp.washpipe_roughness)
+    washpipe_dp = _calc_array(wec.calc_DPf, washpipe_ff, abp.fluid_density, washpipe_velocity, abp.washpipe_id, 1)
+    timer.lap('friction')
+
+    if stats is not None:
+        stats.model = abp.model
+        stats.dune_height_ratio = dune_height_ratio.reshape(shape)
+        stats.outer_iterations = outer_iterations.reshape(shape)
+        stats.inner_iterations = inner_iterations.reshape(shape)
+        stats.residual_rate = residual_rate.reshape(shape)
+        stats.residual_concentration = residual_concentration.reshape(shape)
+        stats.residual_dp = (screen_oh_dp - washpipe_screen_dp).reshape(shape)
+        stats.converged = ((np.abs(residual_rate) <= 0.01) & (np.abs(residual_concentration) <= 0.001)).reshape(shape)
+
+    values = [array.reshape(shape) for array in (dune_height_ratio, dune_height, hydraulic_diameter, equivalent_diameter, area_o, area_i, perimeter_o, perimeter_i, width_o, width_i,
+                                                 transport_velocity, screen_oh_rate, wp_screen_rate, pump_rate, return_rate, screen_oh_dp, washpipe_screen_dp,
+                                                 washpipe_screen_dp_beta, washpipe_dp)]
+    return ABWaveResults(abp.name, abp.description, *values, model=abp.model)
 
-def show_plots(alphawave_curve, alphawave_curve0, alphawave_curve1, alphawave_curve2, alphawave_curve3):
-    #plots
-    #plt.plot(alphawave_curve.dune_height_ratio, alphawave_curve.pump_rate)
+def show_plots(*alphawave_curves):
+    #each curve is an ABWaveResultSet or a {dune_height_ratio: ABWaveResults} dictionary
+    #matplotlib is only imported here so solving and batch runs do not pay for it or need a display
+    import matplotlib.pyplot as plt
     plt.title('Pump Rate vs Dune Height Ratio')
     plt.xlabel('Pump Rate', fontsize=8)
     plt.ylabel('Dune Height Ratio', fontsize=8)
     plt.tick_params(axis='both', which='major', labelsize=6)
     plt.grid()
     
-    cases = list(alphawave_curve.keys())
-    plt.plot([alphawave_curve[dhr].pump_rate for dhr in list(alphawave_curve.keys())], [alphawave_curve[dhr].dune_height_ratio for dhr in list(alphawave_curve.keys())], label=alphawave_curve[0.7].name)
-    plt.plot([alphawave_curve0[dhr].pump_rate for dhr in cases], [alphawave_curve0[dhr].dune_height_ratio for dhr in cases], label=alphawave_curve0[0.7].name)
-    plt.plot([alphawave_curve1[dhr].pump_rate for dhr in cases], [alphawave_curve1[dhr].dune_height_ratio for dhr in cases], label=alphawave_curve1[0.7].name)
-    plt.plot([alphawave_curve2[dhr].pump_rate for dhr in cases], [alphawave_curve2[dhr].dune_height_ratio for dhr in cases], label=alphawave_curve2[0.7].name)
-    plt.plot([alphawave_curve3[dhr].pump_rate for dhr in cases], [alphawave_curve3[dhr].dune_height_ratio for dhr in cases], label=alphawave_curve3[0.7].name)  
-    plt.legend(['SGS', 'SGS alt', 'Oroskar', 'Oroskar mod', 'Hang'], loc='best')
+    for alphawave_curve in alphawave_curves:
+        if not isinstance(alphawave_curve, ABWaveResultSet):
+            alphawave_curve = ABWaveResultSet(alphawave_curve.values())
+        label = alphawave_curve.model[0] if len(alphawave_curve) and alphawave_curve.model[0] is not None else alphawave_curve.name[0]
+        plt.plot(alphawave_curve.pump_rate, alphawave_curve.dune_height_ratio, label=label)
+    plt.legend(loc='best')
 
     plt.show()
 
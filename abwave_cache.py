@@ -0,0 +1,135 @@
+'''
+@author: Jack Charles   https://jackcharlesconsulting.com/
+'''
+
+import hashlib
+import json
+import math
+import os
+import tempfile
+import calcs.abwave as abw
+
+class ResultCache():
+    #content addressed cache of solved points in a local directory, shared by every process pointed at the same directory
+    #keys hash the numeric inputs, model, dune height ratio, solver options and ABWAVE_SOLVER_VERSION, so names and descriptions can differ
+    #entries are written to a temporary file and renamed into place, readers never see a partial entry
+    #when the directory grows past max_bytes the least recently used entries are removed down to 90 %
+    #the cache is best effort: I/O errors (disk full, read-only share, entries removed by another process) are counted in errors, never raised
+    def __init__(self, directory:str, max_bytes:int=256 * 1024**2, check_interval:int=256):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.check_interval = check_interval
+        self.hits = 0
+        self.misses = 0
+        self.errors = 0
+        self._stores_since_check = 0
+        os.makedirs(directory, exist_ok=True)
+
+    def __getstate__(self):
+        #only the location and limits travel to worker processes, statistics stay per process
+        return {'directory': self.directory, 'max_bytes': self.max_bytes, 'check_interval': self.check_interval}
+
+    def __setstate__(self, state):
+        self.__init__(**state)
+
+    def key(self, abinputs:abw.ABWaveInputData, dune_height_ratio:float, derivative:str='fd', table:bool=False):
+        normalized = {field: repr(float(getattr(abinputs, field))) for field in abw.ABWAVE_NUMERIC_FIELDS}
+        normalized.update({'model': abinputs.model, 'dune_height_ratio': repr(float(dune_height_ratio)),
+                           'derivative': derivative, 'table': table, 'solver_version': abw.ABWAVE_SOLVER_VERSION})
+        return hashlib.sha256(json.dumps(normalized, sort_keys=True).encode()).hexdigest()
+
+    def _path(self, key:str):
+        return os.path.join(self.directory, key[:2], key[2:] + '.json')
+
+    def lookup(self, abinputs:abw.ABWaveInputData, dune_height_ratio:float, derivative:str='fd', table:bool=False):
+        #(ABWaveResults, concentration) or None, the stored point is relabelled with the name and description of abinputs
+        path = self._path(self.key(abinputs, dune_height_ratio, derivative, table))
+        try:
+            with open(path, 'r') as file:
+                entry = json.load(file)
+            values = [math.nan if entry[field] is None else entry[field] for field in abw.ABWAVE_RESULT_FIELDS]
+        except (OSError, ValueError, KeyError, TypeError):       #missing, partial from another writer or corrupt
+            self.misses = self.misses + 1
+            return None
+        try:
+            os.utime(path)      #mtime is the recency used for eviction
+        except OSError:         #read-only cache, the entry is still a hit
+            self.errors = self.errors + 1
+        self.hits = self.hits + 1
+        output = abw.ABWaveResults(abinputs.name, abinputs.description, *values, model=abinputs.model)
+        return output, entry.get('concentration')
+
+    def get(self, abinputs:abw.ABWaveInputData, dune_height_ratio:float, derivative:str='fd', table:bool=False):
+        cached = self.lookup(abinputs, dune_height_ratio, derivative, table)
+        return None if cached is None else cached[0]
+
+    def store(self, abinputs:abw.ABWaveInputData, dune_height_ratio:float, derivative:str, table:bool, output:abw.ABWaveResults, concentration:float=None):
+        path = self._path(self.key(abinputs, dune_height_ratio, derivative, table))
+        entry = {field: None if getattr(output, field) is None else float(getattr(output, field)) for field in abw.ABWAVE_RESULT_FIELDS}
+        entry['concentration'] = None if concentration is None else float(concentration)
+        temporary_path = None
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            handle, temporary_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+            with os.fdopen(handle, 'w') as file:
+                json.dump(entry, file)
+            os.replace(temporary_path, path)
+        except OSError:
+            self.errors = self.errors + 1
+            if temporary_path is not None:
+                try:
+                    os.remove(temporary_path)
+                except OSError:
+                    pass
+            return
+        self._stores_since_check = self._stores_since_check + 1
+        if self._stores_since_check >= self.check_interval:
+            self._stores_since_check = 0
+            try:
+                self.evict()
+            except OSError:
+                self.errors = self.errors + 1
+
+    def put(self, abinputs:abw.ABWaveInputData, dune_height_ratio:float, output:abw.ABWaveResults, derivative:str='fd', table:bool=False):
+        self.store(abinputs, dune_height_ratio, derivative, table, output)
+
+    def _entries(self):
+        entries = []
+        for subdirectory in os.scandir(self.directory):
+            if not subdirectory.is_dir():
+                continue
+            for entry in os.scandir(subdirectory.path):
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:       #removed by another process
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+        return entries
+
+    def size(self):
+        return sum(size for _, size, _ in self._entries())
+
+    def evict(self):
+        #removes least recently used entries until the directory is below 90 % of max_bytes, safe to run from several processes
+        entries = self._entries()
+        total = sum(size for _, size, _ in entries)
+        if total <= self.max_bytes:
+            return
+        for _, size, path in sorted(entries):
+            if total <= 0.9 * self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total = total - size
+
+    def clear(self):
+        for _, _, path in self._entries():
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+    def info(self):
+        return {'hits': self.hits, 'misses': self.misses, 'errors': self.errors, 'entries': len(self._entries()), 'bytes': self.size(), 'max_bytes': self.max_bytes}
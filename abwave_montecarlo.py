@@ -0,0 +1,98 @@
+'''
+@author: Jack Charles   https://jackcharlesconsulting.com/
+'''
+
+import copy
+import os
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import calcs.abwave as abw
+
+MONTE_CARLO_FIELDS = ('pump_rate', 'screen_oh_dp', 'washpipe_screen_dp', 'washpipe_screen_dp_beta', 'washpipe_dp')
+DISTRIBUTIONS = ('normal', 'uniform', 'triangular', 'lognormal')
+
+def _sample(distribution, rng:np.random.Generator, size:int):
+    #distribution is ('normal', mean, std), ('uniform', low, high), ('triangular', low, mode, high), ('lognormal', median, sigma),
+    #a constant, or a callable(rng, size) returning the samples
+    if callable(distribution):
+        return np.asarray(distribution(rng, size), dtype=float)
+    if np.ndim(distribution) == 0:
+        return np.full(size, float(distribution))
+    kind, *parameters = distribution
+    if kind == 'normal':
+        return rng.normal(parameters[0], parameters[1], size)
+    elif kind == 'uniform':
+        return rng.uniform(parameters[0], parameters[1], size)
+    elif kind == 'triangular':
+        return rng.triangular(parameters[0], parameters[1], parameters[2], size)
+    elif kind == 'lognormal':
+        return rng.lognormal(np.log(parameters[0]), parameters[1], size)
+    raise ValueError(f"Unknown distribution '{kind}', use one of {DISTRIBUTIONS} or a callable")
+
+def sample_inputs(ABParameters:abw.ABWaveInputData, distributions:dict, realizations:int, rng:np.random.Generator):
+    #copy of ABParameters with every field in distributions replaced by an array of realizations samples
+    #'washout' is also accepted, a ratio applied to openhole_id
+    abp = copy.copy(ABParameters)
+    for field, distribution in distributions.items():
+        if field == 'washout':
+            continue
+        if field not in abw.ABWAVE_NUMERIC_FIELDS:
+            raise ValueError(f"'{field}' is not a numeric ABWaveInputData field")
+        setattr(abp, field, _sample(distribution, rng, realizations))
+    if 'washout' in distributions:
+        abp.openhole_id = abp.openhole_id * _sample(distributions['washout'], rng, realizations)
+    return abp
+
+def solve_realizations(ABParameters:abw.ABWaveInputData, distributions:dict, dune_height_ratios:list[float], realizations:int, seed, fields:tuple=MONTE_CARLO_FIELDS):
+    #samples realizations inputs and solves them at every dune height ratio in one batch call
+    #returns {field: array (dune height ratios, realizations)} and the converged flags in the same shape
+    abp = sample_inputs(ABParameters, distributions, realizations, np.random.default_rng(seed))
+    for field in abw.ABWAVE_NUMERIC_FIELDS:
+        if np.ndim(getattr(abp, field)) > 0:
+            setattr(abp, field, np.asarray(getattr(abp, field))[np.newaxis, :])
+    stats = abw.SolverStats()
+    with np.errstate(all='ignore'):
+        results = abw.calc_AlphaBetaWave_batch(abp, np.asarray(dune_height_ratios, dtype=float)[:, np.newaxis], stats=stats)
+    shape = (len(dune_height_ratios), realizations)
+    return {field: np.broadcast_to(getattr(results, field), shape) for field in fields}, np.broadcast_to(stats.converged, shape)
+
+class MonteCarloResults():
+    #percentile envelopes per dune height ratio, envelopes[field] is an array (percentiles, dune height ratios)
+    #realizations that did not converge or gave non-finite values are left out of the percentiles
+    #percentiles are plain non-exceedance percentiles, P10 is the low and P90 the high value of a field, the reverse of the
+    #exceedance convention of reserves estimates where P90 is the value exceeded by 90% of realizations
+    def __init__(self, dune_height_ratio, percentiles:tuple, envelopes:dict, realizations:int, converged, samples:dict=None):
+        self.dune_height_ratio = dune_height_ratio
+        self.percentiles = percentiles
+        self.envelopes = envelopes
+        self.realizations = realizations
+        self.converged = converged         #fraction of realizations converged at each dune height ratio
+        self.samples = samples
+
+    def envelope(self, field:str, percentile:float):
+        return self.envelopes[field][self.percentiles.index(percentile)]
+
+def run_monte_carlo(ABParameters:abw.ABWaveInputData, distributions:dict, dune_height_ratios:list[float], realizations:int=10000, seed:int=None,
+                    percentiles:tuple=(10, 50, 90), fields:tuple=MONTE_CARLO_FIELDS, chunk_size:int=2500, max_workers:int=None, keep_samples:bool=False):
+    #P10/P50/P90 (percentiles) of pump rate and pressures at each dune height ratio from realizations samples of the uncertain inputs
+    #distributions: {field: distribution} as for _sample, e.g. {'fluid_viscosity': ('normal', 1.2, 0.1), 'washout': ('uniform', 1.0, 1.15)}
+    #realizations are split in chunks of chunk_size, each with its own random stream spawned from seed, and solved across a process pool,
+    #so the result for a seed does not depend on max_workers; max_workers=1 solves on the current process
+    #keep_samples: also return every realization, {field: array (dune height ratios, realizations)}
+    chunks = [min(chunk_size, realizations - start) for start in range(0, realizations, chunk_size)]
+    seeds = np.random.SeedSequence(seed).spawn(len(chunks))
+    args = [(ABParameters, distributions, dune_height_ratios, size, chunk_seed, fields) for size, chunk_seed in zip(chunks, seeds)]
+    max_workers = max_workers or os.cpu_count() or 1
+    if max_workers == 1 or len(chunks) == 1:
+        outputs = [solve_realizations(*arg) for arg in args]
+    else:
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            outputs = list(executor.map(solve_realizations, *zip(*args)))
+
+    converged = np.concatenate([output[1] for output in outputs], axis=1)
+    samples = {field: np.concatenate([output[0][field] for output in outputs], axis=1) for field in fields}
+    envelopes = {}
+    for field, values in samples.items():
+        values = np.where(converged & np.isfinite(values), values, np.nan)
+        envelopes[field] = np.nanpercentile(values, percentiles, axis=1)
+    return MonteCarloResults(np.asarray(dune_height_ratios, dtype=float), tuple(percentiles), envelopes, realizations, converged.mean(axis=1), samples if keep_samples else None)
@@ -0,0 +1,141 @@
+'''
+@author: Jack Charles   https://jackcharlesconsulting.com/
+'''
+
+import copy
+import math
+import numpy as np
+import util.wellengcalc as wec
+import calcs.abwave as abw
+
+class Section():
+    def __init__(self, length:float, openhole_id:float=None, washout:float=1.0, screen:bool=True, leakoff:float=0.0):
+        #length:ft      openhole_id:in, None keeps the openhole_id of the ABWaveInputData      washout: hole diameter / openhole_id
+        #screen: False for blank pipe, the dune is then carried by the whole rate as there is no return path through the screen
+        #leakoff: fluid lost to formation, bpm per ft of section
+        self.length = length
+        self.openhole_id = openhole_id
+        self.washout = washout
+        self.screen = screen
+        self.leakoff = leakoff
+
+SECTION_RESULT_FIELDS = ('start', 'end', 'rate', 'dune_height_ratio', 'pressure_gradient', 'pressure', 'pack_mass', 'total_pack_mass', 'time', 'total_time')
+
+class SectionResults():
+    #one step of the alpha or beta wave front, start and end:ft from the heel, rate:bpm reaching the front
+    #pressure_gradient:psi/ft added by packing this step, pressure:psi accumulated friction, pack_mass:lbm, time:min
+    __slots__ = ('wave', 'section') + SECTION_RESULT_FIELDS
+
+    def __init__(self, wave:str, section:int, start:float, end:float, rate:float, dune_height_ratio:float, pressure_gradient:float, pressure:float,
+                 pack_mass:float, total_pack_mass:float, time:float, total_time:float):
+        self.wave = wave
+        self.section = section
+        self.start = start
+        self.end = end
+        self.rate = rate
+        self.dune_height_ratio = dune_height_ratio
+        self.pressure_gradient = pressure_gradient
+        self.pressure = pressure
+        self.pack_mass = pack_mass
+        self.total_pack_mass = total_pack_mass
+        self.time = time
+        self.total_time = total_time
+
+class _SectionCurve():
+    #alpha wave curve of one hole size, solved once and inverted with np.interp for every step of every section with that hole size
+    def __init__(self, ABParameters:abw.ABWaveInputData, bounds:tuple, tolerance:float):
+        curve = abw.calc_AlphaBetaWave_adaptive(ABParameters, bounds, tolerance)
+        self.dune_height_ratio = curve.column('dune_height_ratio')
+        self.flow_area = curve.column('area_o') - curve.column('area_i')
+        self.hydraulic_diameter = curve.column('hydraulic_diameter')
+        self.equivalent_diameter = curve.column('equivalent_diameter')
+        self.screen_oh_dp = curve.column('screen_oh_dp')
+        self.annulus_area = wec.calc_area(ABParameters.openhole_id, ABParameters.screen_od)
+        self._inverse = {}
+        for screen, rate in ((True, curve.column('pump_rate')), (False, curve.column('screen_oh_rate'))):
+            order = np.argsort(rate)
+            self._inverse[screen] = (rate[order], self.dune_height_ratio[order])
+
+    def solve(self, rate, screen:bool):
+        #dune height ratio and, above the dune, flow area:in², hydraulic and equivalent diameter:in and dP:psi/ft for the rate:bpm reaching the alpha front
+        #rates beyond the curve are clamped to its bounds
+        x, y = self._inverse[screen]
+        dune_height_ratio = np.interp(rate, x, y)
+        values = [np.interp(dune_height_ratio, self.dune_height_ratio, column) for column in (self.flow_area, self.hydraulic_diameter, self.equivalent_diameter, self.screen_oh_dp)]
+        return (dune_height_ratio, *values)
+
+def _section_steps(section:Section, resolution:float):
+    #step lengths:ft and offsets of each step start from the section start
+    count = max(math.ceil(section.length / resolution), 1)
+    edges = np.minimum(np.arange(count + 1) * resolution, section.length)
+    return np.diff(edges), edges[:-1]
+
+def simulate_sections(ABParameters:abw.ABWaveInputData, sections:list[Section], pump_rate:float, pack_porosity:float=0.4, resolution:float=1.0,
+                      bounds:tuple=(0.5, 0.875), tolerance:float=0.005):
+    #marches the alpha wave from heel to toe and then the beta wave from toe to heel over sections, yielding SectionResults
+    #for every step of resolution:ft as it is reached, steps of a section are solved together with numpy
+    #pump_rate:bpm      pack_porosity: porosity of the placed gravel
+    #alpha wave: the dune height of each step is where the alpha wave curve needs the rate left after leakoff between heel and front,
+    #pressure rises by the slurry friction above the dune over the packed length
+    #beta wave: fills the flow area above the dune, the returns then go through the washpipe-screen annulus instead of above the dune,
+    #pressure rises by the clean fluid washpipe-screen dP (washpipe_screen_dp_beta) less the dP above the dune it replaces
+    #washpipe return friction at the rate reaching the toe is included over the full length from the start
+    #the alpha wave stops if leakoff takes the whole rate before the toe, the beta wave is then not run
+    abp = ABParameters
+    curves:dict[float,_SectionCurve] = {}
+    table = abw.get_washpipe_screen_table(abp)
+    solid_density = abp.solid_density * 8.34 * 7.48052        #lbm/ft³
+    proppant_rate = abp.solid_loading * pump_rate * 42 / (1 + abp.solid_loading * abp.solid_absVol)      #lbm/min
+    rate_in = [pump_rate]       #rate:bpm entering each section
+    for section in sections:
+        rate_in.append(rate_in[-1] - section.leakoff * section.length)
+    pressure = 0.0
+    if rate_in[-1] > 0:
+        pressure = abw.calc_washpipe_dp(abp, rate_in[-1]) * sum(section.length for section in sections)
+    total_pack_mass = total_time = 0.0
+
+    def section_curve(section:Section):
+        openhole_id = (abp.openhole_id if section.openhole_id is None else section.openhole_id) * section.washout
+        if openhole_id not in curves:
+            section_abp = copy.copy(abp)
+            section_abp.openhole_id = openhole_id
+            curves[openhole_id] = _SectionCurve(section_abp, bounds, tolerance)
+        return curves[openhole_id]
+
+    def section_profile(index:int):
+        section = sections[index]
+        curve = section_curve(section)
+        lengths, offsets = _section_steps(section, resolution)
+        rates = rate_in[index] - section.leakoff * offsets
+        return (lengths, offsets, rates, *curve.solve(np.maximum(rates, 0.0), section.screen), curve.annulus_area)
+
+    start = 0.0
+    for index, section in enumerate(sections):
+        lengths, offsets, rates, dune_height_ratio, flow_area, _, _, screen_oh_dp, annulus_area = section_profile(index)
+        pack_mass = (annulus_area - flow_area) / 144 * lengths * (1 - pack_porosity) * solid_density
+        for i in range(lengths.size):
+            if rates[i] <= 0:
+                return
+            pressure = pressure + screen_oh_dp[i] * lengths[i]
+            total_pack_mass = total_pack_mass + pack_mass[i]
+            total_time = total_time + pack_mass[i] / proppant_rate
+            yield SectionResults('alpha', index, start + offsets[i], start + offsets[i] + lengths[i], rates[i], dune_height_ratio[i], screen_oh_dp[i], pressure,
+                                 pack_mass[i], total_pack_mass, pack_mass[i] / proppant_rate, total_time)
+        start = start + section.length
+
+    for index in reversed(range(len(sections))):
+        section = sections[index]
+        start = start - section.length
+        lengths, offsets, rates, dune_height_ratio, flow_area, hydraulic_diameter, equivalent_diameter, screen_oh_dp, _ = section_profile(index)
+        dmass_dlength = flow_area / 144 * (1 - pack_porosity) * solid_density
+        #no screen to return through in blank pipe, the flow path and its dP do not change
+        washpipe_screen_dp = table.dp_for_rate(rates) if section.screen else screen_oh_dp
+        for i in reversed(range(lengths.size)):
+            beta = abw.BetaWave(hydraulic_diameter[i], equivalent_diameter[i], flow_area[i], washpipe_screen_dp[i], dmass_dlength[i])
+            pressure_gradient = beta.washpipe_screen_dp - screen_oh_dp[i]
+            pack_mass = beta.dmass_dlength * lengths[i]
+            pressure = pressure + pressure_gradient * lengths[i]
+            total_pack_mass = total_pack_mass + pack_mass
+            total_time = total_time + pack_mass / proppant_rate
+            yield SectionResults('beta', index, start + offsets[i], start + offsets[i] + lengths[i], rates[i], dune_height_ratio[i], pressure_gradient, pressure,
+                                 pack_mass, total_pack_mass, pack_mass / proppant_rate, total_time)
@@ -0,0 +1,198 @@
+'''
+@author: Jack Charles   https://jackcharlesconsulting.com/
+'''
+
+import argparse
+import asyncio
+import functools
+import json
+import math
+import os
+import socket
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import calcs.abwave as abw
+
+#JSON-RPC 2.0 on localhost, one request or response object per line
+#methods: curve {parameters, dune_height_ratios | adaptive, bounds}, point {parameters, dune_height_ratio},
+#pump_rate {parameters, pump_rates, bounds}, metrics {}
+#parameters is the 'Parameters' section of an abwave_example.json file
+PARSE_ERROR = -32700
+INVALID_REQUEST = -32600
+METHOD_NOT_FOUND = -32601
+INVALID_PARAMS = -32602
+SERVER_ERROR = -32000
+
+def _results_to_json(results):
+    #ABWaveResultSet as {field: list}, or one ABWaveResults as {field: value}, NaN as null
+    if isinstance(results, abw.ABWaveResultSet):
+        columns = {field: list(results.column(field)) for field in abw.ABWAVE_TEXT_FIELDS}
+        columns.update({field: [None if math.isnan(value) else float(value) for value in results.column(field)] for field in abw.ABWAVE_RESULT_FIELDS})
+        return columns
+    values = {field: getattr(results, field) for field in abw.ABWAVE_TEXT_FIELDS}
+    values.update({field: None if getattr(results, field) is None else float(getattr(results, field)) for field in abw.ABWAVE_RESULT_FIELDS})
+    return values
+
+def solve_curve(parameters:dict, dune_height_ratios:list[float]=None, adaptive:float=None, bounds:list[float]=(0.5, 0.875)):
+    abp = abw.abinputs_from_dict(parameters)
+    if adaptive is not None:
+        return _results_to_json(abw.calc_AlphaBetaWave_adaptive(abp, tuple(bounds), adaptive))
+    return _results_to_json(abw.ABWaveResultSet(abw.calc_AlphaBetaWave_continuation(abp, dune_height_ratios).values()))
+
+def solve_point(parameters:dict, dune_height_ratio:float):
+    return _results_to_json(abw.calc_AlphaBetaWave(abw.abinputs_from_dict(parameters), dune_height_ratio))
+
+def solve_pump_rates(parameters:dict, pump_rates:list[float], bounds:list[float]=(0.5, 0.875)):
+    #one result per pump rate, null where the rate is not reached within bounds
+    results = abw.solve_for_pump_rates(abw.abinputs_from_dict(parameters), pump_rates, tuple(bounds))
+    return [None if result is None else _results_to_json(result) for result in results]
+
+SERVICE_METHODS = {'curve': solve_curve, 'point': solve_point, 'pump_rate': solve_pump_rates}
+
+class ServiceMetrics():
+    #request counts and latency:ms of the last latency_window requests, throughput:requests/s since start and over the window
+    def __init__(self, latency_window:int=10000):
+        self.started = time.perf_counter()
+        self.requests = 0
+        self.cache_hits = 0
+        self.coalesced = 0
+        self.computed = 0
+        self.errors = 0
+        self.latencies = deque(maxlen=latency_window)      #(finish time, latency)
+
+    def record(self, start:float):
+        finish = time.perf_counter()
+        self.requests = self.requests + 1
+        self.latencies.append((finish, finish - start))
+
+    def to_dict(self):
+        uptime = time.perf_counter() - self.started
+        metrics = {'uptime': uptime, 'requests': self.requests, 'cache_hits': self.cache_hits, 'coalesced': self.coalesced,
+                   'computed': self.computed, 'errors': self.errors, 'throughput': self.requests / uptime if uptime > 0 else 0.0}
+        if self.latencies:
+            finish = np.array([latency[0] for latency in self.latencies])
+            latency = np.array([latency[1] for latency in self.latencies]) * 1000
+            metrics['latency_ms'] = dict(zip(('p50', 'p90', 'p99', 'max'), [float(value) for value in np.percentile(latency, [50, 90, 99, 100])]))
+            window = finish[-1] - finish[0]
+            metrics['window_throughput'] = (finish.size - 1) / window if window > 0 else None
+        return metrics
+
+class ABWaveService():
+    #asyncio front end: identical requests already being solved share one future, finished results are kept in an LRU cache of cache_size entries,
+    #solves run on a process pool of max_workers so the event loop keeps answering cached requests while they run
+    def __init__(self, max_workers:int=None, cache_size:int=1024):
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.cache_size = cache_size
+        self.cache:OrderedDict[str,object] = OrderedDict()
+        self.in_flight:dict[str,asyncio.Future] = {}
+        self.metrics = ServiceMetrics()
+        self.executor = None
+
+    def _key(self, method:str, params:dict):
+        #parameters are normalised through ABWaveInputData so 4 and 4.0, or a missing name, give the same key
+        params = dict(params)
+        params['parameters'] = abw.abinputs_to_dict(abw.abinputs_from_dict(params['parameters']))
+        return json.dumps([method, params], sort_keys=True)
+
+    async def calculate(self, method:str, params:dict):
+        key = self._key(method, params)
+        if key in self.cache:
+            self.cache.move_to_end(key)
+            self.metrics.cache_hits = self.metrics.cache_hits + 1
+            return self.cache[key]
+        if key in self.in_flight:
+            self.metrics.coalesced = self.metrics.coalesced + 1
+            return await asyncio.shield(self.in_flight[key])
+        future = asyncio.get_running_loop().run_in_executor(self.executor, functools.partial(SERVICE_METHODS[method], **params))
+        self.in_flight[key] = future
+        try:
+            result = await asyncio.shield(future)
+        finally:
+            del self.in_flight[key]
+        self.metrics.computed = self.metrics.computed + 1
+        self.cache[key] = result
+        if len(self.cache) > self.cache_size:
+            self.cache.popitem(last=False)
+        return result
+
+    async def handle_request(self, request):
+        start = time.perf_counter()
+        request_id = request.get('id') if isinstance(request, dict) else None
+        try:
+            if not isinstance(request, dict) or not isinstance(request.get('method'), str):
+                return self._error(request_id, INVALID_REQUEST, 'Invalid request')
+            method = request['method']
+            params = request.get('params', {})
+            if method == 'metrics':
+                return {'jsonrpc': '2.0', 'id': request_id, 'result': self.metrics.to_dict()}
+            if method not in SERVICE_METHODS:
+                return self._error(request_id, METHOD_NOT_FOUND, f"Unknown method '{method}', use one of {list(SERVICE_METHODS) + ['metrics']}")
+            try:
+                result = await self.calculate(method, params)
+            except (KeyError, TypeError, ValueError) as error:
+                return self._error(request_id, INVALID_PARAMS, f"{type(error).__name__}: {error}")
+            return {'jsonrpc': '2.0', 'id': request_id, 'result': result}
+        except Exception as error:
+            return self._error(request_id, SERVER_ERROR, f"{type(error).__name__}: {error}")
+        finally:
+            self.metrics.record(start)
+
+    def _error(self, request_id, code:int, message:str):
+        self.metrics.errors = self.metrics.errors + 1
+        return {'jsonrpc': '2.0', 'id': request_id, 'error': {'code': code, 'message': message}}
+
+    async def _respond(self, line:bytes, writer:asyncio.StreamWriter):
+        try:
+            request = json.loads(line)
+        except ValueError:
+            response = self._error(None, PARSE_ERROR, 'Parse error')
+        else:
+            response = await self.handle_request(request)
+        writer.write(json.dumps(response).encode() + b'\n')
+        await writer.drain()
+
+    async def handle_connection(self, reader:asyncio.StreamReader, writer:asyncio.StreamWriter):
+        #requests on one connection are answered as they finish, match them by id
+        tasks = set()
+        try:
+            while line := await reader.readline():
+                if line.strip():
+                    task = asyncio.create_task(self._respond(line, writer))
+                    tasks.add(task)
+                    task.add_done_callback(tasks.discard)
+            if tasks:
+                await asyncio.gather(*tasks)
+        finally:
+            writer.close()
+
+    async def serve(self, host:str='127.0.0.1', port:int=8765):
+        self.executor = ProcessPoolExecutor(max_workers=self.max_workers)
+        try:
+            server = await asyncio.start_server(self.handle_connection, host, port, limit=2 ** 24)
+            async with server:
+                await server.serve_forever()
+        finally:
+            self.executor.shutdown(cancel_futures=True)
+
+def request(method:str, params:dict=None, host:str='127.0.0.1', port:int=8765, timeout:float=None):
+    #blocking client for scripts and dashboards, returns the result or raises RuntimeError with the service error
+    with socket.create_connection((host, port), timeout=timeout) as connection:
+        connection.sendall(json.dumps({'jsonrpc': '2.0', 'id': 1, 'method': method, 'params': params or {}}).encode() + b'\n')
+        response = json.loads(connection.makefile('rb').readline())
+    if 'error' in response:
+        raise RuntimeError(response['error']['message'])
+    return response['result']
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Local alpha and beta wave calculation service, JSON-RPC over TCP, one JSON object per line')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--cache-size', type=int, default=1024)
+    args = parser.parse_args()
+    try:
+        asyncio.run(ABWaveService(args.workers, args.cache_size).serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,99 @@
+'''
+@author: Jack Charles   https://jackcharlesconsulting.com/
+'''
+
+import copy
+import itertools
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import calcs.abwave as abw
+
+def build_sweep_grid(ABParameters:abw.ABWaveInputData, models:list[str], dune_height_ratios:list[float], **variations):
+    #grid of (ABWaveInputData, dune_height_ratio) cases for models x variations x dune height ratios
+    #variations are input field names with a list of values, e.g. screen_od=[5.5, 6.25], fluid_viscosity=[1.0, 1.2]
+    for field in variations:
+        if field not in abw.ABWAVE_NUMERIC_FIELDS:
+            raise ValueError(f"'{field}' is not a numeric ABWaveInputData field")
+    grid = []
+    for model in models:
+        for values in itertools.product(*variations.values()):
+            abp = copy.copy(ABParameters)
+            abp.model = model
+            for field, value in zip(variations, values):
+                setattr(abp, field, value)
+            for dhr in dune_height_ratios:
+                grid.append((abp, dhr))
+    return grid
+
+def _chunk_grid(grid:list, chunk_size:int):
+    #consecutive cases that share an ABWaveInputData are solved together, so each chunk is one set of inputs
+    chunk_parameters = None
+    chunk_ratios = []
+    for abp, dhr in grid:
+        if abp is not chunk_parameters or len(chunk_ratios) >= chunk_size:
+            if chunk_ratios:
+                yield chunk_parameters, chunk_ratios
+            chunk_parameters = abp
+            chunk_ratios = []
+        chunk_ratios.append(dhr)
+    if chunk_ratios:
+        yield chunk_parameters, chunk_ratios
+
+def _split_batch_results(results:abw.ABWaveResults):
+    #one ABWaveResults per point from the array valued results of calc_AlphaBetaWave_batch
+    values = [np.ravel(getattr(results, field)) for field in abw.ABWAVE_RESULT_FIELDS]
+    return [abw.ABWaveResults(results.name, results.description, *[float(value[i]) for value in values], model=results.model) for i in range(values[0].size)]
+
+def solve_chunk(ABParameters:abw.ABWaveInputData, dune_height_ratios:list[float], batch:bool=True, result_cache=None, instrument:bool=False):
+    #with a result_cache only the points it does not hold are solved, the batch solver gives the same points as the 'fd' scalar solve
+    #instrument returns (results, one SolverStats per point), points are then solved one by one so timings are per point
+    if instrument:
+        solver_stats = [abw.SolverStats() for _ in dune_height_ratios]
+        results = [abw.calc_AlphaBetaWave(ABParameters, dhr, result_cache=result_cache, stats=stats) for dhr, stats in zip(dune_height_ratios, solver_stats)]
+        return results, solver_stats
+    if not batch:
+        return [abw.calc_AlphaBetaWave(ABParameters, dhr, result_cache=result_cache) for dhr in dune_height_ratios]
+    results = [None] * len(dune_height_ratios)
+    if result_cache is not None:
+        results = [result_cache.get(ABParameters, dhr) for dhr in dune_height_ratios]
+    missing = [i for i, result in enumerate(results) if result is None]
+    if missing:
+        solved = _split_batch_results(abw.calc_AlphaBetaWave_batch(ABParameters, [dune_height_ratios[i] for i in missing]))
+        for i, result in zip(missing, solved):
+            results[i] = result
+            if result_cache is not None:
+                result_cache.put(ABParameters, dune_height_ratios[i], result)
+    return results
+
+def _chunk_output(ABParameters:abw.ABWaveInputData, output, instrument:bool):
+    if instrument:
+        for result, stats in zip(*output):
+            yield ABParameters, result, stats
+    else:
+        for result in output:
+            yield ABParameters, result
+
+def run_sweep(grid:list, max_workers:int=None, chunk_size:int=64, batch:bool=True, result_cache=None, instrument:bool=False):
+    #solves every case of the grid across a process pool and yields (ABWaveInputData, ABWaveResults) in grid order
+    #results are streamed as soon as the next chunk in order is done, only a few chunks per worker are kept in flight
+    #result_cache: optional abwave_cache.ResultCache shared by all workers through its directory
+    #instrument: yields (ABWaveInputData, ABWaveResults, SolverStats) instead, see abw.summarize_solver_stats
+    max_workers = max_workers or os.cpu_count() or 1
+    chunks = _chunk_grid(grid, chunk_size)
+    pending = deque()
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        for abp, ratios in itertools.islice(chunks, 2 * max_workers):
+            pending.append((abp, executor.submit(solve_chunk, abp, ratios, batch, result_cache, instrument)))
+        while pending:
+            abp, future = pending.popleft()
+            next_chunk = next(chunks, None)
+            if next_chunk is not None:
+                pending.append((next_chunk[0], executor.submit(solve_chunk, *next_chunk, batch, result_cache, instrument)))
+            yield from _chunk_output(abp, future.result(), instrument)
+
+def run_sweep_serial(grid:list, chunk_size:int=64, batch:bool=True, result_cache=None, instrument:bool=False):
+    #same as run_sweep on the current process, useful for small grids and debugging
+    for abp, ratios in _chunk_grid(grid, chunk_size):
+        yield from _chunk_output(abp, solve_chunk(abp, ratios, batch, result_cache, instrument), instrument)
@@ -0,0 +1,242 @@
+'''
+@author: Jack Charles   https://jackcharlesconsulting.com/
+'''
+
+import argparse
+import asyncio
+import json
+import math
+import sys
+import numpy as np
+import util.wellengcalc as wec
+import calcs.abwave as abw
+
+#samples are JSON lines {"well": name, "time": s, "pump_rate": bpm, "return_rate": bpm, "pressure": psi, "solid_loading": ppa},
+#only time and pump_rate are required, results are JSON lines with the same well and time
+
+class TrackingResults():
+    __slots__ = ('well', 'time', 'wave', 'pump_rate', 'front_rate', 'dune_height_ratio', 'proppant_mass', 'alpha_position', 'beta_position',
+                 'expected_pressure', 'beta_pressure_expected', 'pressure', 'pressure_residual')
+
+    def __init__(self, well:str, time:float, wave:str, pump_rate:float, front_rate:float, dune_height_ratio:float, proppant_mass:float, alpha_position:float,
+                 beta_position:float, expected_pressure:float, beta_pressure_expected:float, pressure:float=None, pressure_residual:float=None):
+        self.well = well
+        self.time = time
+        self.wave = wave
+        self.pump_rate = pump_rate
+        self.front_rate = front_rate
+        self.dune_height_ratio = dune_height_ratio
+        self.proppant_mass = proppant_mass
+        self.alpha_position = alpha_position
+        self.beta_position = beta_position
+        self.expected_pressure = expected_pressure
+        self.beta_pressure_expected = beta_pressure_expected
+        self.pressure = pressure
+        self.pressure_residual = pressure_residual
+
+    def to_dict(self):
+        return {field: getattr(self, field) for field in self.__slots__}
+
+class WellTracker():
+    #live estimate for one well from rate and pressure samples, every update is a few np.interp calls on curves solved once for ABParameters
+    #length:ft of screen interval      pack_porosity: porosity of the placed gravel      time_constant:s of the exponential smoothing of the rates
+    #dune height ratio: where the alpha wave curve needs the smoothed rate reaching the front, the return rate when it is sampled
+    #(leakoff is lost before the returns) and otherwise the pump rate
+    #positions:ft, the alpha front from the heel and the beta front from the toe, advance by the proppant mass pumped since the last
+    #sample over the pack mass per ft, at the current dune height for the alpha wave and the rest of the annulus for the beta wave
+    #expected_pressure:psi friction of the current pack state, beta_pressure_expected:psi at the end of the beta wave at the current pump rate
+    def __init__(self, ABParameters:abw.ABWaveInputData, length:float, pack_porosity:float=0.4, time_constant:float=10.0, well:str='',
+                 bounds:tuple=(0.5, 0.875), tolerance:float=0.005):
+        self.abp = ABParameters
+        self.length = length
+        self.pack_porosity = pack_porosity
+        self.time_constant = time_constant
+        self.well = well
+        curve = abw.calc_AlphaBetaWave_adaptive(ABParameters, bounds, tolerance)
+        order = np.argsort(curve.column('pump_rate'))
+        self._rate = curve.column('pump_rate')[order]
+        self._rate_dune_height_ratio = curve.column('dune_height_ratio')[order]
+        self._dune_height_ratio = curve.column('dune_height_ratio')
+        self._flow_area = curve.column('area_o') - curve.column('area_i')
+        self._screen_oh_dp = curve.column('screen_oh_dp')
+        self._table = abw.get_washpipe_screen_table(ABParameters)
+        self._solid_density = ABParameters.solid_density * 8.34 * 7.48052      #lbm/ft³
+        self._annulus_mass = wec.calc_area(ABParameters.openhole_id, ABParameters.screen_od) / 144 * (1 - pack_porosity) * self._solid_density     #lbm/ft
+        self.time = None
+        self.pump_rate = None
+        self.front_rate = None
+        self.proppant_mass = 0.0
+        self.alpha_mass = 0.0
+        self.alpha_position = 0.0
+        self.beta_position = 0.0
+
+    def _smooth(self, previous:float, value:float, dt:float):
+        if previous is None:
+            return value
+        weight = 1 - math.exp(-dt / self.time_constant) if self.time_constant > 0 else 1.0
+        return previous + weight * (value - previous)
+
+    def update(self, sample:dict):
+        time = float(sample['time'])
+        dt = 0.0 if self.time is None else max(time - self.time, 0.0)
+        pump_rate = float(sample['pump_rate'])
+        front_rate = float(sample['return_rate']) if sample.get('return_rate') is not None else pump_rate
+        solid_loading = float(sample.get('solid_loading', self.abp.solid_loading))
+        pressure = float(sample['pressure']) if sample.get('pressure') is not None else None
+        if not all(math.isfinite(value) for value in (time, pump_rate, front_rate, solid_loading) + (() if pressure is None else (pressure,))):
+            raise ValueError('time, rates, solid_loading and pressure must be finite')      #before any state changes, a NaN would stay in the smoothed rates
+        #sensor noise around zero rate must not pump proppant backwards
+        pump_rate = max(pump_rate, 0.0)
+        front_rate = max(front_rate, 0.0)
+        solid_loading = max(solid_loading, 0.0)
+
+        #proppant pumped since the last sample, trapezoidal on the pump rate, clean fluid rate from the slurry rate
+        mean_rate = pump_rate if self.pump_rate is None else 0.5 * (pump_rate + self.pump_rate)
+        proppant_mass = solid_loading * mean_rate * 42 / (1 + solid_loading * self.abp.solid_absVol) * dt / 60
+        self.proppant_mass = self.proppant_mass + proppant_mass
+        self.time = time
+        self.pump_rate = self._smooth(self.pump_rate, pump_rate, dt)
+        self.front_rate = self._smooth(self.front_rate, front_rate, dt)
+
+        dune_height_ratio = float(np.interp(self.front_rate, self._rate, self._rate_dune_height_ratio))
+        flow_area = float(np.interp(dune_height_ratio, self._dune_height_ratio, self._flow_area))
+        screen_oh_dp = float(np.interp(dune_height_ratio, self._dune_height_ratio, self._screen_oh_dp))
+        alpha_mass_per_ft = self._annulus_mass - flow_area / 144 * (1 - self.pack_porosity) * self._solid_density
+        if self.alpha_position < self.length:
+            advance = min(proppant_mass / alpha_mass_per_ft, self.length - self.alpha_position)
+            self.alpha_position = self.alpha_position + advance
+            self.alpha_mass = self.alpha_mass + advance * alpha_mass_per_ft
+            proppant_mass = proppant_mass - advance * alpha_mass_per_ft
+        if self.alpha_position >= self.length and proppant_mass > 0:
+            beta_mass_per_ft = self._annulus_mass - self.alpha_mass / self.length
+            self.beta_position = min(self.beta_position + proppant_mass / beta_mass_per_ft, self.length)
+
+        washpipe_screen_dp_beta = self._table.dp_for_rate(self.pump_rate)
+        washpipe_dp = abw.calc_washpipe_dp(self.abp, self.front_rate) * self.length if self.front_rate > 0 else 0.0
+        beta_pressure_expected = washpipe_screen_dp_beta * self.length + washpipe_dp
+        if self.alpha_position < self.length:
+            wave = 'alpha'
+            expected_pressure = screen_oh_dp * self.alpha_position + washpipe_dp
+        else:
+            wave = 'beta' if self.beta_position < self.length else 'complete'
+            expected_pressure = screen_oh_dp * (self.length - self.beta_position) + washpipe_screen_dp_beta * self.beta_position + washpipe_dp
+        return TrackingResults(self.well, time, wave, self.pump_rate, self.front_rate, dune_height_ratio, self.proppant_mass, self.alpha_position,
+                               self.beta_position, expected_pressure, beta_pressure_expected, pressure, None if pressure is None else pressure - expected_pressure)
+
+class TrackingHub():
+    #one WellTracker per well, created on the first sample of a well from its configuration or the default inputs
+    #wells: {well: {'input': abwave json file, 'length': ft, 'pack_porosity': optional}}
+    def __init__(self, ABParameters:abw.ABWaveInputData=None, length:float=None, wells:dict=None, **tracker_options):
+        self.abp = ABParameters
+        self.length = length
+        self.wells = wells or {}
+        self.tracker_options = tracker_options
+        self.trackers:dict[str,WellTracker] = {}
+
+    def tracker(self, well:str):
+        if well not in self.trackers:
+            config = self.wells.get(well, {})
+            abp = abw.read_saved_file_json(config['input'])[0] if 'input' in config else self.abp
+            length = config.get('length', self.length)
+            if abp is None or length is None:
+                raise ValueError(f"No inputs or length for well '{well}'")
+            options = dict(self.tracker_options)
+            options.update({key: value for key, value in config.items() if key not in ('input', 'length')})
+            self.trackers[well] = WellTracker(abp, length, well=well, **options)
+        return self.trackers[well]
+
+    def process_line(self, line:str):
+        #JSON line of results for a JSON line sample, None for blank lines, errors are reported in an 'error' line instead of stopping the stream
+        line = line.strip()
+        if not line:
+            return None
+        try:
+            sample = json.loads(line)
+            if not isinstance(sample, dict):
+                raise ValueError(f"sample must be a JSON object, not {type(sample).__name__}")
+            return json.dumps(self.tracker(str(sample.get('well', ''))).update(sample).to_dict(), allow_nan=False)      #NaN is not JSON, report it instead
+        except (KeyError, TypeError, ValueError, OSError) as error:       #OSError: missing input file of a configured well
+            return json.dumps({'error': f"{type(error).__name__}: {error}", 'line': line})
+
+async def read_file_tail(filename:str, poll_interval:float=0.2, from_start:bool=True):
+    #lines appended to filename, like tail -f
+    with open(filename, 'r') as file:
+        if not from_start:
+            file.seek(0, 2)
+        partial = ''
+        while True:
+            line = file.readline()
+            if not line:
+                await asyncio.sleep(poll_interval)
+                continue
+            partial = partial + line
+            if partial.endswith('\n'):
+                yield partial
+                partial = ''
+
+async def read_stream(stream=None):
+    #lines from a pipe, stdin by default, until it is closed
+    stream = stream or sys.stdin
+    reader = asyncio.StreamReader()
+    await asyncio.get_running_loop().connect_read_pipe(lambda: asyncio.StreamReaderProtocol(reader), stream)
+    while line := await reader.readline():
+        yield line.decode()
+
+async def serve_socket(hub:TrackingHub, output, host:str='127.0.0.1', port:int=8766):
+    #every connection streams samples, for any number of wells, and gets its results back on the same connection as well as on output
+    async def handle_connection(reader:asyncio.StreamReader, writer:asyncio.StreamWriter):
+        try:
+            while line := await reader.readline():
+                result = hub.process_line(line.decode())
+                if result is not None:
+                    writer.write(result.encode() + b'\n')
+                    await writer.drain()
+                    _emit(result, output)
+        finally:
+            writer.close()
+    server = await asyncio.start_server(handle_connection, host, port)
+    async with server:
+        await server.serve_forever()
+
+def _emit(result:str, output):
+    output.write(result + '\n')
+    output.flush()
+
+async def track(hub:TrackingHub, lines, output=None):
+    #results of every sample of an async line source written to output as JSON lines
+    output = output or sys.stdout
+    async for line in lines:
+        result = hub.process_line(line)
+        if result is not None:
+            _emit(result, output)
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Live dune height, alpha and beta wave front and pressure estimates from streamed rate and pressure samples')
+    parser.add_argument('--input', default=None, help='abwave json file used for wells without their own configuration')
+    parser.add_argument('--length', type=float, default=None, help='screen interval length:ft')
+    parser.add_argument('--wells', default=None, help="json file {well: {'input': file, 'length': ft}}")
+    parser.add_argument('--pack-porosity', type=float, default=0.4)
+    parser.add_argument('--time-constant', type=float, default=10.0, help='rate smoothing:s')
+    source = parser.add_mutually_exclusive_group()
+    source.add_argument('--tail', default=None, metavar='FILE', help='follow a file of JSON line samples')
+    source.add_argument('--port', type=int, default=None, help='accept JSON line samples on a localhost socket')
+    parser.add_argument('--output', default=None, help='results file, defaults to stdout')
+    args = parser.parse_args()
+
+    abinputs = abw.read_saved_file_json(args.input)[0] if args.input else None
+    wells = None
+    if args.wells:
+        with open(args.wells, 'r') as file:
+            wells = json.load(file)
+    hub = TrackingHub(abinputs, args.length, wells, pack_porosity=args.pack_porosity, time_constant=args.time_constant)
+    output = open(args.output, 'a') if args.output else sys.stdout
+    try:
+        if args.port is not None:
+            asyncio.run(serve_socket(hub, output, port=args.port))
+        else:
+            asyncio.run(track(hub, read_file_tail(args.tail) if args.tail else read_stream(), output))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if output is not sys.stdout:
+            output.close()
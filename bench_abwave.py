@@ -0,0 +1,154 @@
+'''
+@author: Jack Charles   https://jackcharlesconsulting.com/
+'''
+
+import argparse
+import copy
+import datetime
+import json
+import os
+import platform
+import subprocess
+import time
+import numpy as np
+import calcs.abwave as abw
+import calcs.abwave_sweep as abws
+
+MODELS = ['Oroskar', 'Oroskar mod', 'Hang']
+CURVE_RATIOS = [0.5, 0.525, 0.55, 0.575, 0.6, 0.625, 0.65, 0.675, 0.7, 0.725, 0.75, 0.775, 0.8, 0.825, 0.85, 0.875]
+
+def build_geometries(example_filename:str):
+    #abwave_example.json plus stress cases that push the solver: tight washpipe-screen clearance, high solid loading, high viscosity
+    abinputs, _, _ = abw.read_saved_file_json(example_filename)
+    geometries = {'example': abinputs}
+    stress = {'tight clearance': {'screen_id': abinputs.washpipe_od + 0.25},
+              'high loading': {'solid_loading': 2.0},
+              'high viscosity': {'fluid_viscosity': 20.0}}
+    for name, changes in stress.items():
+        geometry = copy.copy(abinputs)
+        geometry.name = name
+        for field, value in changes.items():
+            setattr(geometry, field, value)
+        geometries[name] = geometry
+    return geometries
+
+def _with_model(abinputs:abw.ABWaveInputData, model:str):
+    abinputs = copy.copy(abinputs)
+    abinputs.model = model
+    return abinputs
+
+def _time(function, repeat:int, warm:bool):
+    #best of repeat runs, memoized geometry and hydraulics are cleared before each run unless warm
+    best = None
+    for _ in range(repeat):
+        if not warm:
+            abw.clear_abwave_caches()
+        start = time.perf_counter()
+        output = function()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, output
+
+def _record(results:dict, name:str, seconds:float, points:int, solver_stats:list=None):
+    entry = {'seconds': seconds, 'points': points, 'points_per_second': points / seconds if seconds > 0 else None}
+    if solver_stats:
+        summary = abw.summarize_solver_stats(solver_stats)
+        models = summary['models'].values()
+        entry['inner_iterations'] = sum(model['inner_iterations']['total'] for model in models) / max(summary['points'], 1)
+        entry['outer_iterations'] = sum(model['outer_iterations']['total'] for model in models) / max(summary['points'], 1)
+        entry['not_converged'] = len(summary['not_converged'])
+    results[name] = entry
+    print(f"{name:60s}{seconds * 1000:10.2f} ms{entry['points_per_second'] or 0:12.0f} pts/s")
+
+def run_benchmarks(example_filename:str, repeat:int=3, batch_points:int=2000, sweep_workers:int=None, warm:bool=False):
+    results = {}
+    for geometry_name, geometry in build_geometries(example_filename).items():
+        for model in MODELS:
+            abinputs = _with_model(geometry, model)
+            prefix = f"{geometry_name}/{model}"
+
+            stats = abw.SolverStats()
+            seconds, _ = _time(lambda: abw.calc_AlphaBetaWave(abinputs, 0.7, stats=stats), repeat, warm)
+            _record(results, f"{prefix}/point", seconds, 1, [stats])
+
+            def curve():
+                solver_stats = [abw.SolverStats() for _ in CURVE_RATIOS]
+                for dhr, stats in zip(CURVE_RATIOS, solver_stats):
+                    abw.calc_AlphaBetaWave(abinputs, dhr, stats=stats)
+                return solver_stats
+            seconds, solver_stats = _time(curve, repeat, warm)
+            _record(results, f"{prefix}/curve", seconds, len(CURVE_RATIOS), solver_stats)
+
+            def continuation():
+                solver_stats = []
+                abw.calc_AlphaBetaWave_continuation(abinputs, CURVE_RATIOS, solver_stats=solver_stats)
+                return solver_stats
+            seconds, solver_stats = _time(continuation, repeat, warm)
+            _record(results, f"{prefix}/curve continuation", seconds, len(CURVE_RATIOS), solver_stats)
+
+            def table():
+                dp_table = abw.get_washpipe_screen_table(abinputs)
+                solver_stats = [abw.SolverStats() for _ in CURVE_RATIOS]
+                for dhr, stats in zip(CURVE_RATIOS, solver_stats):
+                    abw.calc_AlphaBetaWave(abinputs, dhr, dp_table=dp_table, stats=stats)
+                return solver_stats
+            seconds, solver_stats = _time(table, repeat, warm)
+            _record(results, f"{prefix}/curve table", seconds, len(CURVE_RATIOS), solver_stats)
+
+            ratios = np.linspace(CURVE_RATIOS[0], CURVE_RATIOS[-1], batch_points)
+            def batch():
+                stats = abw.SolverStats()
+                abw.calc_AlphaBetaWave_batch(abinputs, ratios, stats=stats)
+                return [stats]
+            seconds, solver_stats = _time(batch, repeat, warm)
+            _record(results, f"{prefix}/batch {batch_points}", seconds, batch_points, solver_stats)
+
+    #process pool sweep over every geometry and model at once
+    grid = []
+    for geometry in build_geometries(example_filename).values():
+        for model in MODELS:
+            abinputs = _with_model(geometry, model)
+            grid.extend((abinputs, float(dhr)) for dhr in np.linspace(CURVE_RATIOS[0], CURVE_RATIOS[-1], batch_points // 4))
+    seconds, _ = _time(lambda: sum(1 for _ in abws.run_sweep(grid, max_workers=sweep_workers)), 1, warm)
+    _record(results, f"sweep/{len(grid)} points", seconds, len(grid))
+    return results
+
+def _git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+def save_benchmarks(results:dict, output_filename:str):
+    data_dictionary = {'commit': _git_commit(), 'date': datetime.datetime.now().isoformat(timespec='seconds'),
+                       'python': platform.python_version(), 'numpy': np.__version__, 'machine': platform.machine(),
+                       'cpu_count': os.cpu_count(), 'results': results}
+    os.makedirs(os.path.dirname(os.path.abspath(output_filename)), exist_ok=True)
+    with open(output_filename, 'w') as file:
+        json.dump(data_dictionary, file, indent=4)
+
+def compare_benchmarks(baseline_filename:str, results:dict):
+    #speedup of the current run over a saved run, > 1 is faster
+    with open(baseline_filename, 'r') as file:
+        baseline = json.load(file)
+    print(f"\nspeedup vs {baseline['commit']} ({baseline['date']})")
+    for name, entry in results.items():
+        if name in baseline['results']:
+            print(f"{name:60s}{baseline['results'][name]['seconds'] / entry['seconds']:8.2f}x")
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark calc_AlphaBetaWave across models and geometries')
+    parser.add_argument('--example', default=os.path.join(os.path.dirname(os.path.abspath(__file__)), 'abwave_example.json'))
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--batch-points', type=int, default=2000)
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--warm', action='store_true', help='keep memoized geometry and hydraulics between repeats')
+    parser.add_argument('--output', default=None, help='json file, defaults to bench_results/<commit>.json')
+    parser.add_argument('--compare', default=None, help='saved json file to compare against')
+    args = parser.parse_args()
+
+    results = run_benchmarks(args.example, args.repeat, args.batch_points, args.workers, args.warm)
+    save_benchmarks(results, args.output or os.path.join('bench_results', f"{_git_commit()}.json"))
+    if args.compare:
+        compare_benchmarks(args.compare, results)
@@ -0,0 +1,49 @@
+'''
+@author: Jack Charles   https://jackcharlesconsulting.com/
+'''
+
+import argparse
+import copy
+import os
+import sys
+import numpy as np
+import calcs.abwave as abw
+
+#guards the batch solver: calc_AlphaBetaWave_batch against calc_AlphaBetaWave point by point with the installed wellengcalc,
+#for every available model and each fluid viscosity so laminar and turbulent friction are both covered, exits with 1 when they differ by more than the tolerance
+
+def check_batch_solver(ABParameters:abw.ABWaveInputData, models:list[str], dune_height_ratios:list[float]):
+    #{model: largest relative difference over every result field} between the batch and the scalar ('fd') solver
+    differences = {}
+    for model in models:
+        abp = copy.copy(ABParameters)
+        abp.model = model
+        batch = abw.calc_AlphaBetaWave_batch(abp, dune_height_ratios)
+        difference = 0.0
+        for i, dhr in enumerate(dune_height_ratios):
+            scalar = abw.calc_AlphaBetaWave(abp, dhr)
+            for field in abw.ABWAVE_RESULT_FIELDS:
+                value = getattr(scalar, field)
+                difference = max(difference, abs(float(np.ravel(getattr(batch, field))[i]) - value) / max(abs(value), 1e-12))
+        differences[model] = difference
+    return differences
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Check the batch solver against the scalar solver with the installed wellengcalc')
+    parser.add_argument('--example', default=os.path.join(os.path.dirname(os.path.abspath(__file__)), 'abwave_example.json'))
+    parser.add_argument('--viscosities', nargs='+', type=float, default=[1, 12, 50], help='fluid viscosities:cP checked besides the one in the example')
+    parser.add_argument('--tolerance', type=float, default=1e-9)
+    args = parser.parse_args()
+
+    abinputs = abw.read_saved_file_json(args.example)[0]
+    models = [model for model, model_class in abw.TRANSPORT_MODELS.items() if model_class.available()]
+    ratios = [float(dhr) for dhr in np.linspace(0.5, 0.875, 16)]
+    failed = False
+    for fluid_viscosity in [abinputs.fluid_viscosity] + args.viscosities:
+        abp = copy.copy(abinputs)
+        abp.fluid_viscosity = fluid_viscosity
+        for model, difference in check_batch_solver(abp, models, ratios).items():
+            status = 'ok' if difference <= args.tolerance else 'FAILED'
+            failed = failed or status == 'FAILED'
+            print(f"{fluid_viscosity:8g} cP  {model:16s}{difference:12.3e}  {status}")
+    sys.exit(1 if failed else 0)
@@ -2,53 +2,78 @@
 @author: Jack Charles   https://jackcharlesconsulting.com/
 '''
 
-import math
-import json
-import numpy as np
-import matplotlib.pyplot as plt
-import util.wellengcalc as wec
-import util.unit as uunit
+import argparse
+import copy
+import os
+import sys
 import calcs.abwave as abw
 
-openhole_id = 8.5
-openhole_roughness = 0.05
-screen_od = 6.25
-screen_id = 5.0
-screen_roughness = 0.007
-centralizer_od = 7.25
-washpipe_od = 4
-washpipe_id = 3.5
-washpipe_roughness = 0.007
-solid_diameter = 0.0287
-solid_density = 1.60
-solid_loading = 0.75
-solid_absVol = 0.0443
-fluid_density = 8.80
-fluid_viscosity = 1.2
-dune_height_ratio = [0.5, 0.525, 0.55, 0.575, 0.6, 0.625, 0.65, 0.675, 0.7, 0.725, 0.75, 0.775, 0.8, 0.825, 0.85, 0.875]
+DUNE_HEIGHT_RATIOS = [0.5, 0.525, 0.55, 0.575, 0.6, 0.625, 0.65, 0.675, 0.7, 0.725, 0.75, 0.775, 0.8, 0.825, 0.85, 0.875]
+OUTPUT_EXTENSIONS = {'csv': '.csv', 'binary': '.npy', 'json': '.json'}
 
-aw_parameters_Oroskar = abw.ABWaveInputData('SGS case', 'SGS solution', openhole_id, openhole_roughness, screen_od, screen_id, screen_roughness, centralizer_od, washpipe_od, washpipe_id, washpipe_roughness, 
-                 solid_diameter, solid_density, solid_loading, solid_absVol, fluid_density, fluid_viscosity, "Oroskar")
-aw_parameters_Oroskar_mod = abw.ABWaveInputData('SGS case', 'SGS solution', openhole_id, openhole_roughness, screen_od, screen_id, screen_roughness, centralizer_od, washpipe_od, washpipe_id, washpipe_roughness, 
-                 solid_diameter, solid_density, solid_loading, solid_absVol, fluid_density, fluid_viscosity, "Oroskar mod")
-aw_parameters_Hang = abw.ABWaveInputData('SGS case', 'SGS solution', openhole_id, openhole_roughness, screen_od, screen_id, screen_roughness, centralizer_od, washpipe_od, washpipe_id, washpipe_roughness, 
-                 solid_diameter, solid_density, solid_loading, solid_absVol, fluid_density, fluid_viscosity, "Hang")
+def parse_arguments(argv:list[str]=None):
+    parser = argparse.ArgumentParser(description='Alpha and beta wave curves for input files in the abwave_example.json format')
+    parser.add_argument('inputs', nargs='+', help='input json files')
+    parser.add_argument('-m', '--models', nargs='+', default=None, help="transport models, 'all' for every model available with the installed wellengcalc, defaults to the model of each file")
+    parser.add_argument('-r', '--ratios', nargs='+', type=float, default=DUNE_HEIGHT_RATIOS, help='dune height ratios')
+    parser.add_argument('--adaptive', type=float, default=None, metavar='TOLERANCE',
+                        help='sample between the smallest and largest ratio until interpolation is within TOLERANCE, instead of solving every ratio')
+    parser.add_argument('-f', '--format', choices=list(OUTPUT_EXTENSIONS), default='csv')
+    parser.add_argument('-o', '--output-dir', default=None, help='defaults to the folder of each input file')
+    parser.add_argument('--plot', action='store_true', help='show the pump rate curves, needs matplotlib and a display')
+    args = parser.parse_args(argv)
+    if args.models is not None:
+        available = [model for model, model_class in abw.TRANSPORT_MODELS.items() if model_class.available()]
+        if 'all' in args.models:
+            args.models = available
+        for model in args.models:
+            if model not in abw.TRANSPORT_MODELS:
+                parser.error(f"unknown model '{model}', use one of {available}")
+            if model not in available:
+                parser.error(f"model '{model}' needs a wellengcalc with {abw.TRANSPORT_MODELS[model].correlation_name}, use one of {available}")
+    return args
 
-# results1 = []
-# results2 = []
-# results3 = []
+def solve_file(abinputs:abw.ABWaveInputData, models:list[str], ratios:list[float], adaptive:float=None):
+    #every model of one input file in one result set, told apart by its model column
+    results = abw.ABWaveResultSet()
+    for model in models:
+        abp = copy.copy(abinputs)
+        abp.model = model
+        if adaptive is None:
+            results.extend(abw.calc_AlphaBetaWave_continuation(abp, ratios).values())
+        else:
+            results.extend(abw.calc_AlphaBetaWave_adaptive(abp, (min(ratios), max(ratios)), adaptive))
+    return results
 
-results1 = {}
-results2 = {}
-results3 = {}
+def write_results(abinputs:abw.ABWaveInputData, results:abw.ABWaveResultSet, unit_class, data_filename:str, output_format:str):
+    if output_format == 'csv':
+        abw.write_saved_file_csv(results, data_filename)
+    elif output_format == 'binary':
+        abw.write_saved_file_binary(abinputs, results, unit_class, data_filename)
+    else:
+        abw.write_saved_file_json(abinputs, results, unit_class, data_filename)
 
-print("DHR\tDH\tScreenOH\tReturn")
-for i in range(len(dune_height_ratio)):
-    results1[dune_height_ratio[i]] = abw.calc_AlphaBetaWave(aw_parameters_Oroskar, dune_height_ratio[i])
-    results2[dune_height_ratio[i]] = abw.calc_AlphaBetaWave(aw_parameters_Oroskar_mod, dune_height_ratio[i])
-    results3[dune_height_ratio[i]] = abw.calc_AlphaBetaWave(aw_parameters_Hang, dune_height_ratio[i])
-    #print(f"{results1[i].dune_height_ratio: .2f}\t{results1[i].dune_height: .2f}\t{results1[i].screen_oh_rate: .2f}\t{results1[i].return_rate: .2f}\t")
-    #print(f"{results1[i].dune_height_ratio: .3f}\t{results1[i].screen_oh_dp: .2f}\t{results1[i].washpipe_screen_dp: .2f} \
-    #                                            \t{results2[i].screen_oh_dp: .2f}\t{results2[i].washpipe_screen_dp: .2f} \
-    #                                            \t{results3[i].screen_oh_dp: .2f}\t{results3[i].washpipe_screen_dp: .2f}")
-abw.show_plots(results1, results2, results3)
+def main(argv:list[str]=None):
+    args = parse_arguments(argv)
+    curves = []
+    for input_filename in args.inputs:
+        abinputs, _, unit_class = abw.read_saved_file_json(input_filename)
+        models = args.models or [abinputs.model]
+        try:
+            results = solve_file(abinputs, models, args.ratios, args.adaptive)
+        except ValueError as error:
+            sys.exit(f"{input_filename}: {error}")
+        output_dir = args.output_dir or os.path.dirname(os.path.abspath(input_filename))
+        os.makedirs(output_dir, exist_ok=True)
+        stem = os.path.splitext(os.path.basename(input_filename))[0]
+        output_filename = os.path.join(output_dir, f"{stem}_results{OUTPUT_EXTENSIONS[args.format]}")
+        write_results(abinputs, results, unit_class, output_filename, args.format)
+        print(output_filename)
+        if args.plot:
+            curves.extend(results.select(model=model) for model in models)
+    if args.plot:
+        abw.show_plots(*curves)
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())